@@ -2,123 +2,111 @@ import sys
 from report_scripts.elitistGAanalysis import elitistAnalysisRes
 from report_scripts.numericalAnalysis import numericalAnalysisRes
 from report_scripts.tableRes import tableResult
+from services.async_fetch.AsyncFetcher import AsyncFetcher
 from services.cplex import execCplex
 from services.election_api.ElectionResult import process_population_data
-from services.elitistga import execEga
-from services.json_api.JSONManipulation import initialize_json, generate_json_and_map
-from services.nominatim.Nominatim import calculate_distances
+from services.json_api.ColumnarStore import export_columnar
+from services.json_api.DatabaseSession import DatabaseSession
+from services.json_api.JSONManipulation import initialize_json, generate_json_and_map_batch
+from services.nominatim.Nominatim import calculate_distances, configure_geocode_cache
+from services.open_street_api.OverpassCache import OverpassCache
 from services.open_street_api.TransportMap import TransportMap
+from services.spatial_index.NeighbourhoodIndex import load_neighbourhood_index
 
 if __name__ == "__main__":
 
     input_file = "database/input/kadikoy.xlsx"
     output_file = "database/output/database.json"
+    columnar_file = "database/output/database.npz"
+    boundary_file = "database/input/kadikoy_neighbourhoods.geojson"
+
+    stop_styles = {
+        "bus": ("blue", "info-sign"),
+        "metro": ("purple", "info-sign"),
+        "poi": ("green", "info-sign"),
+    }
+    poi_types = [
+        "taxi", "fast_food", "cafe", "restaurant", "college", "library", "school", "university", "atm",
+        "hospital", "arts_centre", "cinema", "theatre", "grave_yard", "social_centre", "social_facility",
+        #### OPTIONAL #####
+        "nightclub",
+        #-"bank", "clinic", "dentist", "pharmacy", "post_office", "toilets", "baking_oven",
+    ]
+
+    # Optional arguments after the mode
+    known_options = {"-enableMapUpdate", "-offlineGeocoding", "-replayOverpass"}
+    options = sys.argv[2:]
+
+    if len(sys.argv) >= 2 and set(options) <= known_options:
+        if "-offlineGeocoding" in options:
+            # Addresses are only read from the geocoding cache, misses are reported instead of queried
+            configure_geocode_cache(offline=True)
+
+        # All update stages share the in-memory database, which is written once before the calculations
+        database = DatabaseSession(output_file)
 
-    if len(sys.argv) == 3 or len(sys.argv) == 2 :
         if sys.argv[1] == "-updateAll":
             # Initialize JSON
-            initialize_json(output_file)
+            initialize_json(database)
 
             # Process population data
-            process_population_data(input_file, output_file)
+            process_population_data(input_file, database)
             
 
         try:
+            # Offline neighbourhood assignment is used when a boundary file is available
+            neighbourhood_index = load_neighbourhood_index(boundary_file)
 
-            transport_map = TransportMap("Kadıkoy, Istanbul, Turkey")
-            transport_map1 = TransportMap("19 MAYIS MAHALLESİ, Istanbul, Turkey", radius_km=3)
+            # In replay mode Overpass queries are answered from recorded responses only
+            overpass_cache = OverpassCache(replay="-replayOverpass" in options)
+            transport_map = TransportMap("Kadıkoy, Istanbul, Turkey", overpass_cache=overpass_cache)
+            # Overlapping areas share one map, so their stops are fetched and stored once
+            transport_map.add_area("19 MAYIS MAHALLESİ, Istanbul, Turkey", radius_km=3)
 
             # Add search areas
             transport_map.add_search_area_circle()
-            transport_map1.add_search_area_circle()
 
-            # Update JSON and map with bus stop data
+            # Collect the stop types requested by the update mode
+            stop_types = []
             if sys.argv[1] == "-updateAll" or sys.argv[1] == "-updateBusStops":
-                generate_json_and_map(output_file, transport_map, "bus", "blue", "info-sign")
-                generate_json_and_map(output_file, transport_map1, "bus", "blue", "info-sign")
-                
-            # Update JSON and map with metro stop data
-
+                stop_types.append("bus")
             if sys.argv[1] == "-updateAll" or sys.argv[1] == "-updateMetroStops":
-                generate_json_and_map(output_file, transport_map, "metro", "purple", "info-sign")
-                generate_json_and_map(output_file, transport_map1, "metro", "purple", "info-sign")
-                
-
-            # Update JSON and map with POI points data
+                stop_types.append("metro")
             if sys.argv[1] == "-updateAll" or sys.argv[1] == "-updatePoiPoints":
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="taxi")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="taxi")
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign", poi_type="fast_food")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign", poi_type="fast_food")
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="cafe")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="cafe")
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="restaurant")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="restaurant")
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="college")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="college")
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="library")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="library")
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="school")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="school")
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="university")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="university")
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="atm")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="atm")
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="hospital")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="hospital")
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="arts_centre")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="arts_centre")
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="cinema")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="cinema")
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="theatre")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="theatre")
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="grave_yard")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="grave_yard")
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="social_centre")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="social_centre")
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="social_facility")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="social_facility")
-
-                
-                
-                #### OPTIONAL #####
-
-                generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="nightclub")
-                generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="nightclub")
-
-                #-generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="bank")
-                #-generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="bank")
-                #-generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="clinic")
-                #-generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="clinic")
-                #-generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="dentist")
-                #-generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="dentist")
-                #-generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="pharmacy")
-                #-generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="pharmacy")
-                #-generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="post_office")
-                #-generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="post_office")
-                #-generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="toilets")
-                #-generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="toilets")
-                #-generate_json_and_map(output_file, transport_map, "poi", "green", "info-sign",  poi_type="baking_oven")
-                #-generate_json_and_map(output_file, transport_map1, "poi", "green", "info-sign",  poi_type="baking_oven")
-                
-            calculate_distances(output_file)
+                stop_types.append("poi")
+
+            # Update JSON and map with bus, metro and POI points data in one Overpass request
+            if stop_types:
+                # Network requests share one pooled session; Nominatim's usage policy keeps geocoding serial
+                with AsyncFetcher() as fetcher:
+                    updated = generate_json_and_map_batch(database, transport_map, stop_types, stop_styles, poi_types,
+                                                          neighbourhood_index=neighbourhood_index, fetcher=fetcher)
+                if not updated:
+                    # A batch that failed part way leaves the session half updated: discard it instead of writing it
+                    database.rollback()
+                    raise RuntimeError(f"stop update failed, {output_file} was left unchanged")
+
+            calculate_distances(database, neighbourhood_index)
+            database.commit()
+            # JSON stays the human-readable export, the optimizers read the columnar archive
+            export_columnar(database.data, columnar_file)
 
             # CPlex and Elitist GA
             if sys.argv[1] == "-onlyCalculations":
                 ##print("run cplex and elitist ga")
                 
-                execCplex(output_file)
-                #execEga(output_file)
+                execCplex(columnar_file)
+                #execEga(columnar_file)
             
             # Table of the result of objective functions
             if sys.argv[1] == "-onlyReport":
-                tableResult(output_file)
+                tableResult(columnar_file)
 
             if sys.argv[1] == "-onlyNumerical":
-                numericalAnalysisRes(output_file)
+                numericalAnalysisRes(columnar_file)
 
             if sys.argv[1] == "-onlyElitist":
-                elitistAnalysisRes(output_file)
+                elitistAnalysisRes(columnar_file)
 
                 
             if not(sys.argv[1] == "-updateAll" or sys.argv[1] == "-updatePoiPoints" or sys.argv[1] == "-updateMetroStops" or sys.argv[1] == "-updateBusStops" or sys.argv[1] == "-onlyCalculations" or sys.argv[1] == "-onlyReport" or sys.argv[1] == "-onlyNumerical" or sys.argv[1] == "-onlyElitist"):
@@ -127,9 +115,7 @@ if __name__ == "__main__":
 
 
             # Save the map (optional)
-            if len(sys.argv) == 3 and sys.argv[2] == "-enableMapUpdate":
-                # Merge transport_map1 into transport_map
-                transport_map.merge_map(transport_map1)
+            if "-enableMapUpdate" in options:
                 # Save the combined map with all markers and search areas
                 transport_map.save_map("kadikoy_combined_transport_map.html")
 
@@ -140,4 +126,4 @@ if __name__ == "__main__":
         print("\nInvalid Argument\n"
               "Example: python main.py "
               "Argument 1: <-updateAll | -updateBusStops | -updatePoiPoints | -updateMetroStops | -onlyCalculations | -onlyReport> | -onlyNumerical | -onlyElitist \n"
-              "Argument 2: <-enableMapUpdate>")
\ No newline at end of file
+              "Options: [-enableMapUpdate] [-offlineGeocoding] [-replayOverpass]")
\ No newline at end of file
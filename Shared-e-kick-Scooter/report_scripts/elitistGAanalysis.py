@@ -1,98 +1,106 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from mpl_toolkits.mplot3d import Axes3D
-import json
-import math
-import random
-from typing import List, Tuple
+from services.coverage import neighbour_lists, zone_coordinates
+from services.ga_engine import PopulationEngine
+from services.json_api.ColumnarStore import load_zones
+from services.nsga2 import ParetoArchive, rank_and_crowding, survivor_selection
 
 class EnhancedElitistGAOptimizer:
     def __init__(self, data_file, distance_threshold=0.2, num_locations=5, 
-                 pop_size=200, generations=100, mutation_rate=0.1):
-        with open(data_file, 'r', encoding='utf-8') as f:
-            self.zones = json.load(f)
+                 pop_size=200, generations=100, mutation_rate=0.1, seed=None, archive_size=100):
+        self.zones = load_zones(data_file)
         
         self.DISTANCE_THRESHOLD = distance_threshold
         self.NUM_LOCATIONS = num_locations
         self.POP_SIZE = pop_size
         self.GENERATIONS = generations
         self.MUTATION_RATE = mutation_rate
+        self.SEED = seed
+        self.ARCHIVE_SIZE = archive_size
         self.preprocess_data()
     
     def preprocess_data(self):
         self.I = list(range(len(self.zones)))
         self.population = {i: zone.get('population', 0) for i, zone in enumerate(self.zones)}
         self.poi_count = {i: zone.get('poi_number', 0) for i, zone in enumerate(self.zones)}
+        # Objectives are summed over the zones within DISTANCE_THRESHOLD of a selected location:
+        # population and POIs (every plan has NUM_LOCATIONS sites, so their count is not an objective)
+        # Individuals are sorted arrays of NUM_LOCATIONS distinct zone indices
+        neighbours = neighbour_lists(*zone_coordinates(self.zones), self.DISTANCE_THRESHOLD)
+        self.engine = PopulationEngine({
+            'population': [self.population[i] for i in self.I],
+            'poi': [self.poi_count[i] for i in self.I],
+        }, self.NUM_LOCATIONS, neighbours, mutation_rate=self.MUTATION_RATE, seed=self.SEED)
         
-    def compute_objectives(self, solution):
-        selected_zones = [i for i, selected in enumerate(solution) if selected]
-        f1 = sum(self.population[i] for i in selected_zones)
-        f2 = sum(self.poi_count[i] for i in selected_zones)
-        f3 = len(selected_zones)  # Coverage objective
-        return f1, f2, f3
+    def compute_objectives(self, population):
+        # (individuals x 2) array of f1, f2 for the whole population
+        return self.engine.evaluate(population)
     
     def initialize_population(self):
-        population = []
-        for _ in range(self.POP_SIZE):
-            solution = [0] * len(self.I)
-            selected_indices = random.sample(self.I, self.NUM_LOCATIONS)
-            for index in selected_indices:
-                solution[index] = 1
-            population.append(solution)
-        return population
+        return self.engine.random_population(self.POP_SIZE)
     
     def select_parents(self, population, fitness_values):
-        sorted_population = [x for _, x in sorted(zip(fitness_values, population), 
-                           key=lambda k: sum(k[0]), reverse=True)]
-        return sorted_population[:self.POP_SIZE//2]
+        # Binary tournaments: lower front rank wins, ties go to the less crowded individual
+        rank, crowding = rank_and_crowding(fitness_values)
+        first = self.engine.rng.integers(0, len(population), size=self.POP_SIZE)
+        second = self.engine.rng.integers(0, len(population), size=self.POP_SIZE)
+        first_wins = (rank[first] < rank[second]) | ((rank[first] == rank[second]) & (crowding[first] >= crowding[second]))
+        return population[np.where(first_wins, first, second)]
     
-    def crossover(self, parent1, parent2):
-        point = random.randint(1, len(parent1)-1)
-        child1 = parent1[:point] + parent2[point:]
-        child2 = parent2[:point] + parent1[point:]
-        return child1, child2
+    def crossover(self, parents1, parents2):
+        return self.engine.uniform_crossover(parents1, parents2)
     
-    def mutate(self, solution):
-        for i in range(len(solution)):
-            if random.random() < self.MUTATION_RATE:
-                solution[i] = 1 - solution[i]
-        return solution
+    def mutate(self, population):
+        return self.engine.swap_mutate(population)
         
     def optimize_and_visualize(self):
+        # NSGA-II: parents and offspring compete for survival by front rank and crowding distance
         population = self.initialize_population()
-        pareto_front = []
+        fitness_values = self.compute_objectives(population)
+        archive = ParetoArchive(self.ARCHIVE_SIZE)
         
         for gen in range(self.GENERATIONS):
-            fitness_values = [self.compute_objectives(ind) for ind in population]
-            pareto_front.extend(fitness_values)
+            archive.update(fitness_values, population)
             
             selected = self.select_parents(population, fitness_values)
-            population = self.create_next_generation(selected)
+            offspring = self.create_next_generation(selected)
+
+            combined = np.concatenate([population, offspring])
+            combined_fitness = np.concatenate([fitness_values, self.compute_objectives(offspring)])
+            survivors = survivor_selection(combined_fitness, self.POP_SIZE)
+            population, fitness_values = combined[survivors], combined_fitness[survivors]
             
             if (gen + 1) % 10 == 0:
                 print(f"Generation {gen + 1}/{self.GENERATIONS}")
+        archive.update(fitness_values, population)
+
+        if self.engine.cache is not None:
+            print(f"Fitness cache: {self.engine.cache.stats()}")
         
+        # Only the non-dominated solutions are kept, at most ARCHIVE_SIZE of them
+        pareto_front = archive.front()
+        self.pareto_solutions = archive.solutions
         self.plot_final_results(pareto_front)
         return pareto_front
 
     def create_next_generation(self, selected):
-        next_gen = []
-        while len(next_gen) < self.POP_SIZE:
-            p1, p2 = random.sample(selected, 2)
-            c1, c2 = self.crossover(p1, p2)
-            next_gen.extend([self.mutate(c1), self.mutate(c2)])
-        return next_gen[:self.POP_SIZE]
+        # Random pairs of distinct parents, each producing two children
+        pairs = (self.POP_SIZE + 1) // 2
+        first = self.engine.rng.integers(0, len(selected), size=pairs)
+        second = (first + self.engine.rng.integers(1, len(selected), size=pairs)) % len(selected)
+        c1, c2 = self.crossover(selected[first], selected[second])
+        next_gen = np.stack([c1, c2], axis=1).reshape(-1, selected.shape[1])
+        return self.mutate(next_gen[:self.POP_SIZE])
 
     def plot_final_results(self, pareto_front):
         fig = plt.figure(figsize=(15, 10))
         
-        # 3D Pareto Front
-        ax1 = fig.add_subplot(221, projection='3d')
+        # Pareto Front
+        ax1 = fig.add_subplot(221)
         points = np.array(pareto_front)
-        ax1.scatter(points[:, 0], points[:, 1], points[:, 2])
-        ax1.set_xlabel('Objective 1')
-        ax1.set_ylabel('Objective 2')
-        ax1.set_zlabel('Objective 3')
+        ax1.scatter(points[:, 0], points[:, 1])
+        ax1.set_xlabel('Covered population')
+        ax1.set_ylabel('Covered POIs')
         ax1.set_title('Pareto Front')
         
         # Score Histogram
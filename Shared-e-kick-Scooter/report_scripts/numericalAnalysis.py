@@ -1,51 +1,34 @@
-import json
 import math
 import time
 import matplotlib.pyplot as plt
-from docplex.cp.model import CpoModel
 from tabulate import tabulate
+from services.coverage import CoverageSweep, cached_distance_matrix, neighbour_lists, zone_coordinates
+from services.experiments import ExperimentExecutor, available_cpus, solve_sweep
+from services.json_api.ColumnarStore import load_zones
+from services.mclp import covering_model
 
 class EScooterLocationOptimizer:
-    def __init__(self, data_file, distance_threshold=1, num_locations=5):
-        with open(data_file, 'r', encoding='utf-8') as f:
-            self.zones = json.load(f)
+    def __init__(self, data_file, distance_threshold=1, num_locations=5, backend='highs'):
+        self.zones = load_zones(data_file)
         
         self.DISTANCE_THRESHOLD = distance_threshold  # Dc in kilometers
         self.NUM_LOCATIONS = num_locations  # s in the tables
+        self.backend = backend  # MCLP solver backend: 'highs', 'cpo' or 'greedy'
         self.preprocess_data()
 
-    @staticmethod
-    def haversine_distance(lat1, lon1, lat2, lon2):
-        """Calculate the great circle distance between two points on the Earth."""
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
-        c = 2 * math.asin(math.sqrt(a))
-        r = 6371  # Radius of Earth in kilometers
-        return c * r
-
     def preprocess_data(self):
         """Preprocess the zone data and compute necessary metrics."""
         self.I = list(range(len(self.zones)))
         self.J = list(range(len(self.zones)))
         self.population = {i: zone.get('population', 0) for i, zone in enumerate(self.zones)}
         self.poi_count = {i: zone.get('poi_number', 0) for i, zone in enumerate(self.zones)}
-        self.coverage_matrix = self.compute_coverage_matrix()
+        self.neighbours = self.compute_neighbour_lists()
         self.bus_accessibility = self.compute_accessibility('bus_stations')
         self.metro_accessibility = self.compute_accessibility('metro_stations')
 
-    def compute_coverage_matrix(self):
-        """Compute a coverage matrix based on distance thresholds."""
-        coverage = {}
-        for i in self.I:
-            for j in self.J:
-                dist = self.haversine_distance(
-                    self.zones[i]['latitude'], self.zones[i]['longitude'],
-                    self.zones[j]['latitude'], self.zones[j]['longitude']
-                )
-                coverage[(i, j)] = 1 if dist <= self.DISTANCE_THRESHOLD else 0
-        return coverage
+    def compute_neighbour_lists(self):
+        """Compute sparse coverage: for every zone i, the locations j within the distance threshold."""
+        return neighbour_lists(*zone_coordinates(self.zones), self.DISTANCE_THRESHOLD)
 
     def compute_accessibility(self, station_key):
         """Compute accessibility scores for bus or metro stations."""
@@ -59,57 +42,35 @@ class EScooterLocationOptimizer:
             accessibility[i] = score
         return accessibility
 
+    def objective_weights(self):
+        """Per-zone weights of every objective function."""
+        return {
+            'population_coverage': [self.population[i] for i in self.I],
+            'bus_accessibility': [self.bus_accessibility[i] for i in self.I],
+            'metro_accessibility': [self.metro_accessibility[i] for i in self.I],
+            'poi_coverage': [self.poi_count[i] for i in self.I],
+        }
+
     def optimize_locations(self):
         """Perform multi-objective optimization to select e-scooter locations."""
         results = {}
 
-        objectives = {
-            'population_coverage': lambda mdl, yi: mdl.sum(self.population[i] * yi[i] for i in self.I),
-            'bus_accessibility': lambda mdl, yi: mdl.sum(self.bus_accessibility[i] * yi[i] for i in self.I),
-            'metro_accessibility': lambda mdl, yi: mdl.sum(self.metro_accessibility[i] * yi[i] for i in self.I),
-            'poi_coverage': lambda mdl, yi: mdl.sum(self.poi_count[i] * yi[i] for i in self.I),
-        }
+        # Variables and constraints are built once, each objective only replaces the model's objective
+        model = covering_model(self.neighbours, self.NUM_LOCATIONS, backend=self.backend)
 
-        for obj_name, obj_func in objectives.items():
+        for obj_name, weights in self.objective_weights().items():
             start_time = time.time()
 
-            # Create a new model for each objective
-            mdl = CpoModel(name=f"E-Scooter Optimization - {obj_name}")
-
-            # Decision variables
-            xj = mdl.binary_var_dict(self.J, name="location_selection")
-            yi = mdl.binary_var_dict(self.I, name="zone_coverage")
-
-            # Add the objective function
-            mdl.add(mdl.maximize(obj_func(mdl, yi)))
-
-            # Add coverage constraints
-            for i in self.I:
-                mdl.add(
-                    mdl.if_then(
-                        mdl.sum(self.coverage_matrix[(i, j)] * xj[j] for j in self.J) > 0,
-                        yi[i] == 1
-                    )
-                )
-                mdl.add(
-                    mdl.if_then(
-                        mdl.sum(self.coverage_matrix[(i, j)] * xj[j] for j in self.J) == 0,
-                        yi[i] == 0
-                    )
-                )
-
-            # Limit the number of selected locations
-            mdl.add(mdl.sum(xj[j] for j in self.J) == self.NUM_LOCATIONS)
-
-            # Solve the model
-            solution = mdl.solve()
+            # Solve the linear maximal covering model for this objective
+            solution = model.solve(weights)
             
             end_time = time.time()
             cpu_time = end_time - start_time
 
-            if solution:
+            if solution['objective_value'] is not None:
                 results[obj_name] = {
-                    'objective_value': solution.get_objective_value(),
+                    'objective_value': solution['objective_value'],
+                    'selected_locations': solution['selected_locations'],
                     'cpu_time': cpu_time
                 }
 
@@ -117,47 +78,62 @@ class EScooterLocationOptimizer:
 
     def compute_all_results(self, base_distance=1.0, base_locations=5, 
                           distance_range=(0.5, 2.0), distance_steps=5,
-                          location_range=(1, 20), location_steps=20):
+                          location_range=(1, 20), location_steps=20, executor=None):
         """
         Compute results for:
         1. Varying distance with fixed locations
         2. Varying locations with fixed distance
+
+        Every point of a sweep is warm started from the previous one. With an ExperimentExecutor
+        each sweep is split into contiguous chunks solved by its worker processes.
         """
-        distance_results = []
-        location_results = []
-        
         # 1. Vary distance, keep locations constant
         distances = [base_distance + (distance_range[1] - distance_range[0]) * i / distance_steps 
                     for i in range(distance_steps)]
-        
-        for dist in distances:
-            self.DISTANCE_THRESHOLD = dist
-            self.NUM_LOCATIONS = base_locations
-            self.preprocess_data()  # Recompute coverage matrix with new distance
-            result = self.optimize_locations()
-            distance_results.append({
-                'distance': dist,
-                'locations': base_locations,
-                'results': result
-            })
+        distance_configurations = [(base_locations, dist) for dist in distances]
 
         # 2. Vary locations, keep distance constant
-        self.DISTANCE_THRESHOLD = base_distance
         location_counts = range(location_range[0], location_range[1] + 1, 
                               max(1, (location_range[1] - location_range[0]) // location_steps))
-        
-        for locs in location_counts:
-            self.NUM_LOCATIONS = locs
-            self.preprocess_data()
-            result = self.optimize_locations()
-            location_results.append({
-                'distance': base_distance,
+        location_configurations = [(locs, base_distance) for locs in location_counts]
+
+        # Coverage only grows with the threshold: walk the sorted distances once, adding newly covered pairs
+        objectives = self.objective_weights()
+        sweep = CoverageSweep(cached_distance_matrix(*zone_coordinates(self.zones)), objectives)
+        if executor is None:
+            distance_solutions = solve_sweep(sweep, distance_configurations, objectives, self.backend)
+            location_solutions = solve_sweep(sweep, location_configurations, objectives, self.backend)
+        else:
+            distance_solutions = executor.run_sweep(distance_configurations)
+            location_solutions = executor.run_sweep(location_configurations)
+
+        distance_results = []
+        for (locs, dist), solutions in zip(distance_configurations, distance_solutions):
+            sweep.advance(dist)
+            distance_results.append({
+                'distance': dist,
                 'locations': locs,
-                'results': result
+                'results': self.sweep_point_results(solutions),
+                'upper_bounds': sweep.upper_bounds(locs)
             })
-
+        location_results = [
+            {'distance': dist, 'locations': locs, 'results': self.sweep_point_results(solutions)}
+            for (locs, dist), solutions in zip(location_configurations, location_solutions)
+        ]
         return distance_results, location_results
 
+    @staticmethod
+    def sweep_point_results(solutions):
+        """Keep the objective value, sites and CPU time of every solved objective of one sweep point."""
+        return {
+            obj_name: {
+                'objective_value': solution['objective_value'],
+                'selected_locations': solution['selected_locations'],
+                'cpu_time': solution['cpu_time']
+            }
+            for obj_name, solution in solutions.items() if solution['objective_value'] is not None
+        }
+
     def format_results_tables(self, distance_results, location_results):
         """Create formatted tables for both analyses"""
         
@@ -224,11 +200,11 @@ class EScooterLocationOptimizer:
         plt.tight_layout()
         plt.show()
 
-def numericalAnalysisRes(data_file):
+def numericalAnalysisRes(data_file, workers=None):
     optimizer = EScooterLocationOptimizer(data_file)
     
     # Run analysis with custom ranges
-    distance_results, location_results = optimizer.compute_all_results(
+    sweep_ranges = dict(
         base_distance=0.01,
         base_locations=5,
         distance_range=(0.01, 5.0),
@@ -236,6 +212,14 @@ def numericalAnalysisRes(data_file):
         location_range=(1, 20),
         location_steps=20
     )
+    if (workers or available_cpus()) < 2:
+        # A single process walks the sweeps in order, warm starting every point from the previous one
+        distance_results, location_results = optimizer.compute_all_results(**sweep_ranges)
+    else:
+        # Every worker walks a contiguous chunk of each sweep, warm starting along it
+        with ExperimentExecutor(*zone_coordinates(optimizer.zones), optimizer.objective_weights(),
+                                backend=optimizer.backend, max_workers=workers) as executor:
+            distance_results, location_results = optimizer.compute_all_results(**sweep_ranges, executor=executor)
     
     # Generate and print tables
     distance_table, location_table = optimizer.format_results_tables(
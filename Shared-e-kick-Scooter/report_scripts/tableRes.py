@@ -1,50 +1,32 @@
-import json
 import math
 import time
-from docplex.cp.model import CpoModel
 from tabulate import tabulate
+from services.coverage import neighbour_lists, zone_coordinates
+from services.experiments import ExperimentExecutor, available_cpus
+from services.json_api.ColumnarStore import load_zones
+from services.mclp import covering_model
 
 class EScooterLocationOptimizer:
-    def __init__(self, data_file, distance_threshold=1.0, num_locations=5):
-        with open(data_file, 'r', encoding='utf-8') as f:
-            self.zones = json.load(f)
+    def __init__(self, data_file, distance_threshold=1.0, num_locations=5, backend='highs'):
+        self.zones = load_zones(data_file)
         
         self.DISTANCE_THRESHOLD = distance_threshold  # Dc in kilometers
         self.NUM_LOCATIONS = num_locations  # s in the tables
+        self.backend = backend  # MCLP solver backend: 'highs', 'cpo' or 'greedy'
         self.preprocess_data()
 
-    @staticmethod
-    def haversine_distance(lat1, lon1, lat2, lon2):
-        """Calculate the great circle distance between two points on the Earth."""
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
-        c = 2 * math.asin(math.sqrt(a))
-        r = 6371  # Radius of Earth in kilometers
-        return c * r
-
     def preprocess_data(self):
         """Preprocess the zone data and compute necessary metrics."""
         self.I = list(range(len(self.zones)))
         self.J = list(range(len(self.zones)))
         self.population = {i: zone.get('population', 0) for i, zone in enumerate(self.zones)}
         self.poi_count = {i: zone.get('poi_number', 0) for i, zone in enumerate(self.zones)}
-        self.coverage_matrix = self.compute_coverage_matrix()
         self.bus_accessibility = self.compute_accessibility('bus_stations')
         self.metro_accessibility = self.compute_accessibility('metro_stations')
 
-    def compute_coverage_matrix(self):
-        """Compute a coverage matrix based on distance thresholds."""
-        coverage = {}
-        for i in self.I:
-            for j in self.J:
-                dist = self.haversine_distance(
-                    self.zones[i]['latitude'], self.zones[i]['longitude'],
-                    self.zones[j]['latitude'], self.zones[j]['longitude']
-                )
-                coverage[(i, j)] = 1 if dist <= self.DISTANCE_THRESHOLD else 0
-        return coverage
+    def compute_neighbour_lists(self):
+        """Compute sparse coverage: for every zone i, the locations j within the distance threshold."""
+        return neighbour_lists(*zone_coordinates(self.zones), self.DISTANCE_THRESHOLD)
 
     def compute_accessibility(self, station_key):
         """Compute accessibility scores for bus or metro stations."""
@@ -58,97 +40,78 @@ class EScooterLocationOptimizer:
             accessibility[i] = score
         return accessibility
 
+    def objective_weights(self):
+        """Per-zone weights of every objective function."""
+        return {
+            'population_coverage': [self.population[i] for i in self.I],
+            'bus_accessibility': [self.bus_accessibility[i] for i in self.I],
+            'metro_accessibility': [self.metro_accessibility[i] for i in self.I],
+            'poi_coverage': [self.poi_count[i] for i in self.I],
+        }
+
     def optimize_locations(self):
         """Perform multi-objective optimization to select e-scooter locations."""
         results = {}
 
-        objectives = {
-            'population_coverage': lambda mdl, yi: mdl.sum(self.population[i] * yi[i] for i in self.I),
-            'bus_accessibility': lambda mdl, yi: mdl.sum(self.bus_accessibility[i] * yi[i] for i in self.I),
-            'metro_accessibility': lambda mdl, yi: mdl.sum(self.metro_accessibility[i] * yi[i] for i in self.I),
-            'poi_coverage': lambda mdl, yi: mdl.sum(self.poi_count[i] * yi[i] for i in self.I),
-        }
+        # Variables and constraints are built once, each objective only replaces the model's objective
+        model = covering_model(self.compute_neighbour_lists(), self.NUM_LOCATIONS, backend=self.backend)
+
+        for obj_name, weights in self.objective_weights().items():
+            start_time = time.time()
 
+            # Solve the linear maximal covering model for this objective
+            solution = model.solve(weights)
+            
+            end_time = time.time()
+            solution['cpu_time'] = end_time - start_time
+
+            self.add_case_result(results, obj_name, solution)
+
+        return results
+
+    def add_case_result(self, results, obj_name, solution):
+        """Add the table metrics of one solved objective to the results, keyed by its case number."""
         case_mapping = {
             'population_coverage': 1,
             'bus_accessibility': 2,
             'metro_accessibility': 3,
             'poi_coverage': 4
         }
+        case_num = case_mapping[obj_name]
 
-        for obj_name, obj_func in objectives.items():
-            case_num = case_mapping[obj_name]
-            start_time = time.time()
+        if solution['objective_value'] is not None:
+            covered_zones = solution['covered_zones']
+            selected_locations = solution['selected_locations']
             
-            # Create a new model for each objective
-            mdl = CpoModel(name=f"E-Scooter Optimization - {obj_name}")
-
-            # Decision variables
-            xj = mdl.binary_var_dict(self.J, name="location_selection")
-            yi = mdl.binary_var_dict(self.I, name="zone_coverage")
-
-            # Add the objective function
-            mdl.add(mdl.maximize(obj_func(mdl, yi)))
-
-            # Add coverage constraints
-            for i in self.I:
-                mdl.add(
-                    mdl.if_then(
-                        mdl.sum(self.coverage_matrix[(i, j)] * xj[j] for j in self.J) > 0,
-                        yi[i] == 1
-                    )
-                )
-                mdl.add(
-                    mdl.if_then(
-                        mdl.sum(self.coverage_matrix[(i, j)] * xj[j] for j in self.J) == 0,
-                        yi[i] == 0
-                    )
-                )
-
-            # Limit the number of selected locations
-            mdl.add(mdl.sum(xj[j] for j in self.J) == self.NUM_LOCATIONS)
-
-            # Solve the model
-            solution = mdl.solve()
+            total_population = sum(self.population.values())
+            covered_population = sum(self.population[i] for i in covered_zones)
             
-            end_time = time.time()
-            cpu_time = end_time - start_time
-
-            if solution:
-                covered_zones = [i for i in self.I if solution[yi[i]] == 1]
-                selected_locations = [j for j in self.J if solution[xj[j]] == 1]
-                
-                total_population = sum(self.population.values())
-                covered_population = sum(self.population[i] for i in covered_zones)
-                
-                results[case_num] = {
-                    'covered_population': int(covered_population),
-                    'covered_population_percent': (covered_population / total_population * 100),
-                    'covered_zones': len(covered_zones),
-                    'covered_area': len(covered_zones) * 0.01,  # Assuming each zone is 0.01 km²
-                    'covered_area_percent': (len(covered_zones) / len(self.zones) * 100),
-                    'iterations': len(selected_locations),
-                    'cpu_time': cpu_time
-                }
-                
-                # Add case-specific metrics
-                if case_num == 2:
-                    accessibility = sum(self.bus_accessibility[i] for i in covered_zones)
-                    max_accessibility = sum(self.bus_accessibility.values())
-                    results[case_num]['accessibility'] = accessibility
-                    results[case_num]['accessibility_percent'] = (accessibility / max_accessibility * 100)
-                elif case_num == 3:
-                    accessibility = sum(self.metro_accessibility[i] for i in covered_zones)
-                    max_accessibility = sum(self.metro_accessibility.values())
-                    results[case_num]['accessibility'] = accessibility
-                    results[case_num]['accessibility_percent'] = (accessibility / max_accessibility * 100)
-                elif case_num == 4:
-                    poi_count = sum(self.poi_count[i] for i in covered_zones)
-                    total_pois = sum(self.poi_count.values())
-                    results[case_num]['poi_count'] = poi_count
-                    results[case_num]['poi_percent'] = (poi_count / total_pois * 100)
-
-        return results
+            results[case_num] = {
+                'covered_population': int(covered_population),
+                'covered_population_percent': (covered_population / total_population * 100),
+                'covered_zones': len(covered_zones),
+                'covered_area': len(covered_zones) * 0.01,  # Assuming each zone is 0.01 km²
+                'covered_area_percent': (len(covered_zones) / len(self.zones) * 100),
+                'iterations': len(selected_locations),
+                'cpu_time': solution['cpu_time']
+            }
+            
+            # Add case-specific metrics
+            if case_num == 2:
+                accessibility = sum(self.bus_accessibility[i] for i in covered_zones)
+                max_accessibility = sum(self.bus_accessibility.values())
+                results[case_num]['accessibility'] = accessibility
+                results[case_num]['accessibility_percent'] = (accessibility / max_accessibility * 100)
+            elif case_num == 3:
+                accessibility = sum(self.metro_accessibility[i] for i in covered_zones)
+                max_accessibility = sum(self.metro_accessibility.values())
+                results[case_num]['accessibility'] = accessibility
+                results[case_num]['accessibility_percent'] = (accessibility / max_accessibility * 100)
+            elif case_num == 4:
+                poi_count = sum(self.poi_count[i] for i in covered_zones)
+                total_pois = sum(self.poi_count.values())
+                results[case_num]['poi_count'] = poi_count
+                results[case_num]['poi_percent'] = (poi_count / total_pois * 100)
 
     def format_results_table(self, results, case_number):
         """Format results into a table similar to the example images."""
@@ -201,8 +164,8 @@ class EScooterLocationOptimizer:
         return tabulate(data, headers=headers_second_row, tablefmt='grid', 
                        stralign='right', numalign='right')
 
-def tableResult(path):
-    """Execute the optimization for all test configurations."""
+def tableResult(path, workers=None):
+    """Execute the optimization for all test configurations, solving them in parallel worker processes."""
     try:
         test_configurations = [
             
@@ -210,15 +173,27 @@ def tableResult(path):
             
         ]
         
-        all_results = []
-        
+        optimizer = EScooterLocationOptimizer(path)
+        objectives = optimizer.objective_weights()
+
+        # One (objective, s, Dc) job per table, results come back in submission order
+        jobs = [
+            (obj_name, num_locations, distance / 1000)  # Convert to kilometers
+            for num_locations, distance in test_configurations
+            for obj_name in objectives
+        ]
+        # A worker solves all objectives of its configurations, so more workers than configurations would idle
+        workers = min(workers or available_cpus(), len(test_configurations))
+        with ExperimentExecutor(*zone_coordinates(optimizer.zones), objectives,
+                                backend=optimizer.backend, max_workers=workers) as executor:
+            solutions = iter(executor.run(jobs))
+
         for num_locations, distance in test_configurations:
-            optimizer = EScooterLocationOptimizer(
-                path, 
-                distance_threshold=distance/1000,  # Convert to kilometers
-                num_locations=num_locations
-            )
-            results = optimizer.optimize_locations()
+            optimizer.NUM_LOCATIONS = num_locations
+            optimizer.DISTANCE_THRESHOLD = distance / 1000
+            results = {}
+            for obj_name in objectives:
+                optimizer.add_case_result(results, obj_name, next(solutions))
             
             for case_num in range(1, 5):
                 print(f"\nResults of Case {case_num} (obj. Function f{case_num}(y)):")
@@ -0,0 +1,126 @@
+import asyncio
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# Usage policies: Nominatim allows 1 request per second without parallel requests,
+# Overpass gives each client a couple of slots and asks for requests to be spread out.
+DEFAULT_HOST_LIMITS = {
+    "nominatim.openstreetmap.org": (1, 1.0),
+    "overpass-api.de": (2, 1.0),
+}
+
+
+class AsyncFetcher:
+    """
+    Asyncio fetch layer with bounded concurrency, per-host rate limits and retries.
+
+    All requests go through one pooled requests.Session, so connections are reused;
+    the blocking calls run in worker threads and are awaited from the event loop.
+    """
+
+    def __init__(self, max_concurrency=8, host_limits=None, retries=3, backoff_seconds=1.0, timeout=30,
+                 user_agent="geoapi"):
+        """
+        Parameters:
+            max_concurrency (int): Maximum number of requests in flight over all hosts.
+            host_limits (dict): Host -> (max concurrent requests, minimum seconds between requests).
+            retries (int): Number of retries after a failed request.
+            backoff_seconds (float): Initial retry delay, doubled after every failed attempt.
+            timeout (float): Timeout of a single request in seconds.
+            user_agent (str): User-Agent header sent with every request.
+        """
+        self.max_concurrency = max_concurrency
+        self.host_limits = dict(DEFAULT_HOST_LIMITS if host_limits is None else host_limits)
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max(1, len(self.host_limits)), pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["User-Agent"] = user_agent
+
+        self._loop = None
+        self._semaphore = None
+        self._host_semaphores = {}
+        self._host_locks = {}
+        self._host_next_request = {}
+
+    def _ensure_loop_state(self):
+        """
+        asyncio primitives are bound to one event loop, recreate them when a new loop is running.
+        """
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._host_semaphores = {}
+            self._host_locks = {}
+
+    def _host_state(self, host):
+        if host not in self._host_semaphores:
+            max_concurrent, _ = self.host_limits.get(host, (self.max_concurrency, 0.0))
+            self._host_semaphores[host] = asyncio.Semaphore(max_concurrent)
+            self._host_locks[host] = asyncio.Lock()
+        return self._host_semaphores[host], self._host_locks[host]
+
+    async def _wait_for_rate_limit(self, host, lock):
+        _, min_interval = self.host_limits.get(host, (self.max_concurrency, 0.0))
+        async with lock:
+            delay = self._host_next_request.get(host, 0.0) - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._host_next_request[host] = time.monotonic() + min_interval
+
+    def _get(self, url, params):
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    async def get_json(self, url, params=None):
+        """
+        GET a URL and return the decoded JSON body, retrying with exponential backoff.
+        """
+        self._ensure_loop_state()
+        host = urlparse(url).hostname
+        host_semaphore, host_lock = self._host_state(host)
+        delay = self.backoff_seconds
+        for attempt in range(self.retries + 1):
+            try:
+                async with self._semaphore, host_semaphore:
+                    await self._wait_for_rate_limit(host, host_lock)
+                    return await asyncio.to_thread(self._get, url, params)
+            except (requests.RequestException, ValueError) as e:
+                status = e.response.status_code if getattr(e, "response", None) is not None else None
+                # Client errors other than rate limiting will not succeed on retry
+                if attempt == self.retries or (status is not None and status < 500 and status != 429):
+                    raise
+                print(f"Request to {host} failed ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay *= 2
+
+    async def gather(self, coroutines):
+        """
+        Run coroutines concurrently and return their results in order; failures are returned as exceptions.
+        """
+        return await asyncio.gather(*coroutines, return_exceptions=True)
+
+    def run(self, coroutine):
+        """
+        Run a coroutine to completion from synchronous code.
+        """
+        return asyncio.run(coroutine)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
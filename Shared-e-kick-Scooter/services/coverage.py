@@ -0,0 +1,274 @@
+import hashlib
+import os
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371  # Radius of Earth in kilometers
+
+
+def zone_coordinates(zones):
+    """
+    Return the latitude and longitude arrays of a zone list.
+    """
+    lats = np.array([zone['latitude'] for zone in zones], dtype=np.float64)
+    lons = np.array([zone['longitude'] for zone in zones], dtype=np.float64)
+    return lats, lons
+
+
+def haversine_matrix(lats, lons, other_lats=None, other_lons=None):
+    """
+    Vectorized great circle distances between two sets of points.
+
+    Args:
+        lats, lons (array): Coordinates of the demand points (rows), in degrees.
+        other_lats, other_lons (array): Coordinates of the candidate sites (columns), defaults to the demand points.
+
+    Returns:
+        numpy.ndarray: Dense (rows x columns) float matrix of distances in kilometers.
+    """
+    if other_lats is None:
+        other_lats, other_lons = lats, lons
+    lat1 = np.radians(np.asarray(lats, dtype=np.float64))[:, None]
+    lon1 = np.radians(np.asarray(lons, dtype=np.float64))[:, None]
+    lat2 = np.radians(np.asarray(other_lats, dtype=np.float64))[None, :]
+    lon2 = np.radians(np.asarray(other_lons, dtype=np.float64))[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def neighbour_lists(lats, lons, threshold, site_lats=None, site_lons=None):
+    """
+    Sparse coverage: for every zone, the sorted indices of the sites within the threshold.
+
+    Sites are bucketed into a uniform grid of threshold-sized cells on a local equirectangular
+    projection, so each zone only measures the sites of its own and the adjacent cells.
+    Memory and work scale with the number of covered pairs instead of zones x sites.
+
+    Args:
+        lats, lons (array): Zone coordinates in degrees.
+        threshold (float): Coverage distance in kilometers.
+        site_lats, site_lons (array): Candidate site coordinates, defaults to the zones.
+
+    Returns:
+        list: One numpy int array of covering site indices per zone.
+    """
+    lats = np.asarray(lats, dtype=np.float64)
+    lons = np.asarray(lons, dtype=np.float64)
+    if site_lats is None:
+        site_lats, site_lons = lats, lons
+    site_lats = np.asarray(site_lats, dtype=np.float64)
+    site_lons = np.asarray(site_lons, dtype=np.float64)
+    if len(site_lats) == 0 or threshold < 0:
+        return [np.zeros(0, dtype=np.int64) for _ in range(len(lats))]
+
+    # Projected distances must never exceed the true ones: scale longitudes with the smallest cosine
+    # and widen the cells slightly, so a covered site is always in an adjacent cell
+    cell_size = max(threshold * 1.05, 1e-6)
+    x_scale = EARTH_RADIUS_KM * np.cos(np.radians(np.abs(np.concatenate([lats, site_lats])).max()))
+
+    def cells(point_lats, point_lons):
+        x = np.radians(point_lons) * x_scale / cell_size
+        y = np.radians(point_lats) * EARTH_RADIUS_KM / cell_size
+        return np.floor(x).astype(np.int64), np.floor(y).astype(np.int64)
+
+    grid = {}
+    site_cols, site_rows = cells(site_lats, site_lons)
+    for j, cell in enumerate(zip(site_cols.tolist(), site_rows.tolist())):
+        grid.setdefault(cell, []).append(j)
+
+    neighbours = []
+    zone_cols, zone_rows = cells(lats, lons)
+    for i, (col, row) in enumerate(zip(zone_cols.tolist(), zone_rows.tolist())):
+        candidates = [j for dc in (-1, 0, 1) for dr in (-1, 0, 1) for j in grid.get((col + dc, row + dr), ())]
+        if not candidates:
+            neighbours.append(np.zeros(0, dtype=np.int64))
+            continue
+        candidates = np.array(sorted(candidates), dtype=np.int64)
+        distances = haversine_matrix(lats[i:i + 1], lons[i:i + 1], site_lats[candidates], site_lons[candidates])[0]
+        neighbours.append(candidates[distances <= threshold])
+    return neighbours
+
+
+_distance_matrices = {}
+
+
+def coordinates_key(lats, lons):
+    """
+    Hash identifying a zone set by its coordinates.
+    """
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(lats, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(lons, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def cached_distance_matrix(lats, lons, cache_dir="cache"):
+    """
+    Pairwise distance matrix of a zone set, computed once and reused across thresholds and runs.
+
+    The matrix does not depend on the coverage threshold or the number of locations, so it is
+    memoized in memory and persisted as cache/distances-<sha1>.npy, keyed by a hash of the coordinates.
+
+    Args:
+        lats, lons (array): Zone coordinates in degrees.
+        cache_dir (str): Directory of the persisted matrices, None keeps the cache in memory only.
+
+    Returns:
+        numpy.ndarray: Dense (n x n) distance matrix in kilometers (read-only).
+    """
+    key = coordinates_key(lats, lons)
+    if key in _distance_matrices:
+        return _distance_matrices[key]
+
+    path = os.path.join(cache_dir, f"distances-{key}.npy") if cache_dir else None
+    distances = None
+    if path and os.path.exists(path):
+        distances = np.load(path, allow_pickle=False)
+        if distances.shape != (len(lats), len(lons)):
+            distances = None
+    if distances is None:
+        distances = haversine_matrix(lats, lons)
+        if path:
+            os.makedirs(cache_dir, exist_ok=True)
+            temp_path = f"{path}.tmp.npy"
+            np.save(temp_path, distances)
+            os.replace(temp_path, path)
+
+    distances.setflags(write=False)
+    _distance_matrices[key] = distances
+    return distances
+
+
+class CoverageSweep:
+    """
+    Incremental coverage over an increasing sequence of distance thresholds.
+
+    All pairwise distances are sorted once; advancing to a larger threshold only processes
+    the (i, j) pairs that became covered since the previous one, so a dense sweep costs
+    O(n^2 log n) in total instead of one full coverage rebuild per step. The neighbour lists
+    are extended in place and can be passed to covering_model as they are.
+    """
+
+    def __init__(self, distances, weights=None):
+        """
+        Args:
+            distances (numpy.ndarray): (zones x sites) distance matrix in kilometers.
+            weights (dict): Objective name -> per-zone weight array, used for the upper bounds.
+        """
+        self.distances = np.asarray(distances)
+        self.num_zones, self.num_sites = self.distances.shape
+        order = np.argsort(self.distances, axis=None, kind='stable')
+        self._sorted_distances = self.distances.ravel()[order]
+        self._rows, self._cols = np.unravel_index(order, self.distances.shape)
+        self.weights = {name: np.asarray(values, dtype=np.float64) for name, values in (weights or {}).items()}
+        self.reset()
+
+    def reset(self):
+        """
+        Go back to an empty coverage (threshold below every distance).
+        """
+        self.threshold = -np.inf
+        self._position = 0
+        self.neighbours = [[] for _ in range(self.num_zones)]  # sites within the threshold of zone i, nearest first
+        self.site_weight = {name: np.zeros(self.num_sites) for name in self.weights}
+        self.coverable = np.zeros(self.num_zones, dtype=bool)
+
+    def advance(self, threshold):
+        """
+        Extend the coverage to a new threshold and return the newly covered (i, j) pairs.
+        A threshold lower than the current one restarts the sweep from scratch.
+        """
+        if threshold < self.threshold:
+            self.reset()
+        end = int(np.searchsorted(self._sorted_distances, threshold, side='right'))
+        rows = self._rows[self._position:end]
+        cols = self._cols[self._position:end]
+        self._position = end
+        self.threshold = threshold
+
+        self.coverable[rows] = True
+        for name, values in self.weights.items():
+            np.add.at(self.site_weight[name], cols, values[rows])
+        new_pairs = list(zip(rows.tolist(), cols.tolist()))
+        for i, j in new_pairs:
+            self.neighbours[i].append(j)
+        return new_pairs
+
+    def upper_bound(self, name, num_locations):
+        """
+        Upper bound on the weighted coverage reachable with num_locations sites at the current threshold:
+        neither more than every coverable zone, nor more than the best sites counted separately.
+        """
+        site_weight = self.site_weight[name]
+        k = min(num_locations, self.num_sites)
+        best_sites = np.partition(site_weight, self.num_sites - k)[self.num_sites - k:] if k > 0 else site_weight[:0]
+        return float(min(self.weights[name][self.coverable].sum(), best_sites.sum()))
+
+    def upper_bounds(self, num_locations):
+        """
+        Upper bounds of every weighted objective at the current threshold.
+        """
+        return {name: self.upper_bound(name, num_locations) for name in self.weights}
+
+
+
+class BitsetCoverage:
+    """
+    Coverage of every candidate site packed into a bitset row (bit i set when zone i is covered),
+    in the layout of np.packbits(..., bitorder='little').
+
+    The zones covered by a plan are the OR of its sites' rows, and a weighted objective is read
+    byte by byte from precomputed 256-entry tables, so scoring a plan costs k ORs of n / 8 bytes
+    and n / 8 table lookups instead of a scan over zones and neighbour lists.
+    Every method works on a whole population of plans at once.
+    """
+
+    def __init__(self, neighbours, weights=None, num_sites=None):
+        """
+        Args:
+            neighbours (list): For every zone, the indices of the sites covering it.
+            weights (dict): Objective name -> per-zone weights, in the order of the weighted_sums columns.
+            num_sites (int): Number of candidate sites, defaults to the number of zones.
+        """
+        self.num_zones = len(neighbours)
+        self.num_sites = self.num_zones if num_sites is None else num_sites
+        self.num_bytes = (self.num_zones + 7) // 8
+
+        sites = np.array([int(j) for zone_sites in neighbours for j in zone_sites], dtype=np.int64)
+        zones = np.array([i for i, zone_sites in enumerate(neighbours) for _ in zone_sites], dtype=np.int64)
+        self.bits = np.zeros((self.num_sites, self.num_bytes), dtype=np.uint8)
+        np.bitwise_or.at(self.bits, (sites, zones >> 3), (1 << (zones & 7)).astype(np.uint8))
+
+        byte_bits = (np.arange(256)[:, None] >> np.arange(8)[None, :]) & 1  # (byte value x bit) matrix
+        self.popcount = byte_bits.sum(axis=1)
+        self.objective_names = list(weights or {})
+        padded = np.zeros((self.num_bytes * 8, len(self.objective_names)))
+        for m, name in enumerate(self.objective_names):
+            padded[:self.num_zones, m] = np.asarray(weights[name], dtype=np.float64)
+        # tables[b, v, m]: weight of objective m over the zones 8b .. 8b+7 whose bits are set in byte value v
+        self.tables = byte_bits @ padded.reshape(self.num_bytes, 8, -1)
+
+    def covered(self, population):
+        """
+        (individuals x bytes) bitsets of the zones covered by the sites of every individual.
+        """
+        population = np.asarray(population, dtype=np.int64).reshape(-1, np.shape(population)[-1])
+        return np.bitwise_or.reduce(self.bits[population], axis=1)
+
+    def count(self, masks):
+        """
+        Number of zones in every bitset.
+        """
+        return self.popcount[masks].sum(axis=1)
+
+    def weighted_sums(self, masks):
+        """
+        (individuals x objectives) sums of the objective weights over the zones in every bitset.
+        """
+        return self.tables[np.arange(self.num_bytes), masks].sum(axis=1)
+
+    def to_bool(self, masks):
+        """
+        Boolean (individuals x zones) matrix of the zones in every bitset.
+        """
+        return np.unpackbits(masks, axis=1, count=self.num_zones, bitorder='little').astype(bool)
@@ -1,38 +1,28 @@
-import json
 import math
-from docplex.cp.model import CpoModel
 import folium
+from services.coverage import neighbour_lists, zone_coordinates
+from services.json_api.ColumnarStore import load_zones
+from services.mclp import solve_objectives
 
 class EScooterLocationOptimizer:
-    def __init__(self, data_file, distance_threshold=1.0, num_locations=5):
+    def __init__(self, data_file, distance_threshold=1.0, num_locations=5, backend='highs'):
         """
         Initialize the optimizer with configuration parameters.
 
         Args:
-            data_file (str): Path to the JSON data file.
+            data_file (str): Path to the JSON or columnar .npz data file.
             distance_threshold (float): Maximum distance for coverage (in kilometers).
             num_locations (int): Number of e-scooter locations to select.
+            backend (str): MCLP solver backend, 'highs' (scipy), 'cpo' (CP Optimizer)
+                or 'greedy' (lazy greedy heuristic for fast what-if answers).
         """
-        with open(data_file, 'r', encoding='utf-8') as f:
-            self.zones = json.load(f)
+        self.zones = load_zones(data_file)
 
         self.DISTANCE_THRESHOLD = distance_threshold
         self.NUM_LOCATIONS = num_locations
+        self.backend = backend
         self.preprocess_data()
 
-    @staticmethod
-    def haversine_distance(lat1, lon1, lat2, lon2):
-        """
-        Calculate the great circle distance between two points on the Earth.
-        """
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
-        c = 2 * math.asin(math.sqrt(a))
-        r = 6371  # Radius of Earth in kilometers
-        return c * r
-
     def preprocess_data(self):
         """
         Preprocess the zone data and compute necessary metrics.
@@ -41,23 +31,15 @@ class EScooterLocationOptimizer:
         self.J = list(range(len(self.zones)))
         self.population = {i: zone.get('population', 0) for i, zone in enumerate(self.zones)}
         self.poi_count = {i: zone.get('poi_number', 0) for i, zone in enumerate(self.zones)}
-        self.coverage_matrix = self.compute_coverage_matrix()
+        self.neighbours = self.compute_neighbour_lists()
         self.bus_accessibility = self.compute_accessibility('bus_stations')
         self.metro_accessibility = self.compute_accessibility('metro_stations')
 
-    def compute_coverage_matrix(self):
+    def compute_neighbour_lists(self):
         """
-        Compute a coverage matrix based on distance thresholds.
+        Compute sparse coverage: for every zone i, the locations j within the distance threshold.
         """
-        coverage = {}
-        for i in self.I:
-            for j in self.J:
-                dist = self.haversine_distance(
-                    self.zones[i]['latitude'], self.zones[i]['longitude'],
-                    self.zones[j]['latitude'], self.zones[j]['longitude']
-                )
-                coverage[(i, j)] = 1 if dist <= self.DISTANCE_THRESHOLD else 0
-        return coverage
+        return neighbour_lists(*zone_coordinates(self.zones), self.DISTANCE_THRESHOLD)
 
     def compute_accessibility(self, station_key):
         """
@@ -76,60 +58,28 @@ class EScooterLocationOptimizer:
     def optimize_locations(self):
         """
         Perform multi-objective optimization to select e-scooter locations.
+        All objectives are solved on one linear maximal covering model built with the configured backend.
         """
         results = {}
 
         objectives = {
-            'population_coverage': lambda mdl, yi: mdl.sum(self.population[i] * yi[i] for i in self.I),
-            'poi_coverage': lambda mdl, yi: mdl.sum(self.poi_count[i] * yi[i] for i in self.I),
-            'bus_accessibility': lambda mdl, yi: mdl.sum(self.bus_accessibility[i] * yi[i] for i in self.I),
-            'metro_accessibility': lambda mdl, yi: mdl.sum(self.metro_accessibility[i] * yi[i] for i in self.I),
+            'population_coverage': self.population,
+            'poi_coverage': self.poi_count,
+            'bus_accessibility': self.bus_accessibility,
+            'metro_accessibility': self.metro_accessibility,
         }
 
-        for obj_name, obj_func in objectives.items():
-            # Create a new model for each objective
-            mdl = CpoModel(name=f"E-Scooter Optimization - {obj_name}")
-
-            # Decision variables
-            xj = mdl.binary_var_dict(self.J, name="location_selection")
-            yi = mdl.binary_var_dict(self.I, name="zone_coverage")
-
-            # Add the objective function
-            mdl.add(mdl.maximize(obj_func(mdl, yi)))
+        solutions = solve_objectives(
+            {obj_name: [weights[i] for i in self.I] for obj_name, weights in objectives.items()},
+            self.neighbours, self.NUM_LOCATIONS, backend=self.backend
+        )
 
-            # Add coverage constraints
-            for i in self.I:
-                mdl.add(
-                    mdl.if_then(
-                        mdl.sum(self.coverage_matrix[(i, j)] * xj[j] for j in self.J) > 0,
-                        yi[i] == 1
-                    )
-                )
-                mdl.add(
-                    mdl.if_then(
-                        mdl.sum(self.coverage_matrix[(i, j)] * xj[j] for j in self.J) == 0,
-                        yi[i] == 0
-                    )
-                )
-
-            # Limit the number of selected locations
-            mdl.add(mdl.sum(xj[j] for j in self.J) == self.NUM_LOCATIONS)
-
-            # Solve the model
-            solution = mdl.solve()
-
-            if solution:
-                results[obj_name] = {
-                    'objective_value': solution.get_objective_values()[0],
-                    'selected_locations': [j for j in self.J if solution[xj[j]] == 1],
-                    'covered_zones': [i for i in self.I if solution[yi[i]] == 1]
-                }
-            else:
-                results[obj_name] = {
-                    'objective_value': None,
-                    'selected_locations': [],
-                    'covered_zones': []
-                }
+        for obj_name, solution in solutions.items():
+            results[obj_name] = {
+                'objective_value': solution['objective_value'],
+                'selected_locations': solution['selected_locations'],
+                'covered_zones': solution['covered_zones']
+            }
 
         return results
 
@@ -278,10 +228,10 @@ class EScooterLocationOptimizer:
         return m
 
 
-def execCplex(path, save_map=True, map_filename='escooter_locations.html'):
+def execCplex(path, save_map=True, map_filename='escooter_locations.html', backend='highs'):
     try:
         # Initialize optimizer and get results
-        optimizer = EScooterLocationOptimizer(path)
+        optimizer = EScooterLocationOptimizer(path, backend=backend)
         optimization_results = optimizer.optimize_locations()
         detailed_analysis = optimizer.detailed_location_analysis(optimization_results)
 
@@ -1,12 +1,16 @@
 import pandas as pd
-import json
 
+from services.json_api.DatabaseSession import as_session
 from services.localize_char.LocalizeChar import tr_upper
 
 
 def process_population_data(input_file, json_file):
     """
     Processes population data from an Excel file and updates an existing JSON file.
+
+    Parameters:
+        input_file (str): Path to the Excel file with the election results.
+        json_file (str | DatabaseSession): Path to the JSON file or an open database session.
     """
     try:
         # Load Excel File
@@ -21,8 +25,7 @@ def process_population_data(input_file, json_file):
         population_by_neighborhood = population_by_neighborhood[population_by_neighborhood['Toplam Nüfus'] > 0]
 
         # Load the existing JSON file
-        with open(json_file, "r", encoding="utf-8") as f:
-            neighborhood_data = json.load(f)
+        session = as_session(json_file)
 
         # Update the JSON data with real population data
         updated_data = []
@@ -41,10 +44,10 @@ def process_population_data(input_file, json_file):
             })
 
         # Save the updated JSON
-        with open(json_file, "w", encoding="utf-8") as f:
-            json.dump(updated_data, f, ensure_ascii=False, indent=4)
+        session.data = updated_data
+        session.checkpoint()
 
-        print(f"Updated JSON saved: {json_file}")
+        print(f"Updated JSON saved: {session.path}")
 
     except Exception as e:
         print(f"An error occurred: {e}")
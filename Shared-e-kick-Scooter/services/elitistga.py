@@ -1,94 +1,122 @@
-import random
-import math
-import json
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from services.coverage import neighbour_lists, zone_coordinates
+from services.ga_engine import PopulationEngine
+from services.heuristics import interchange, site_coverage
+from services.json_api.ColumnarStore import load_zones
+
+
+def elitist_parents(engine, population, fitness_values, pop_size):
+    """Best tenth of the population plus random individuals; returns the parents and the elite."""
+    order = engine.lexicographic_order(fitness_values)
+    elite = population[order[:pop_size // 10]]
+    others = population[engine.rng.integers(0, len(population), size=pop_size - len(elite))]
+    return np.concatenate([elite, others]), elite
+
+
+def breed(engine, parents):
+    """Pair consecutive parents, every pair produces two mutated children."""
+    pairs = len(parents) // 2
+    child1, child2 = engine.uniform_crossover(parents[0:2 * pairs:2], parents[1:2 * pairs:2])
+    return engine.swap_mutate(np.concatenate([child1, child2]))
+
+
+# Engine of the island worker process, created once by the pool initializer
+_island_engine = None
+
+
+def _init_island_worker(weights, num_locations, neighbours, mutation_rate):
+    global _island_engine
+    _island_engine = PopulationEngine(weights, num_locations, neighbours, mutation_rate=mutation_rate)
+
+
+def _evolve_island(island):
+    """
+    Evolve one island for a number of generations.
+
+    The island carries its population and the state of its random generator, so the result
+    does not depend on which worker process runs it.
+    """
+    engine = _island_engine
+    engine.rng.bit_generator.state = island['rng_state']
+    population = island['population']
+    best_sites, best_fitness = island['best_sites'], island['best_fitness']
+
+    for _ in range(island['generations']):
+        fitness_values = engine.evaluate(population)
+        best = engine.lexicographic_order(fitness_values)[0]
+        if tuple(fitness_values[best].tolist()) > best_fitness:
+            best_fitness = tuple(fitness_values[best].tolist())
+            best_sites = population[best].tolist()
+        parents, _ = elitist_parents(engine, population, fitness_values, len(population))
+        population = breed(engine, parents)
+
+    return {
+        'population': population,
+        'fitness': engine.evaluate(population),
+        'rng_state': engine.rng.bit_generator.state,
+        'best_sites': best_sites,
+        'best_fitness': best_fitness,
+    }
 
 
 class ElitistGAOptimizer:
-    def __init__(self, data_file, distance_threshold=0.2, num_locations=5, pop_size=10, generations=5, mutation_rate=0.1):
-        with open(data_file, 'r', encoding='utf-8') as f:
-            self.zones = json.load(f)
+    def __init__(self, data_file, distance_threshold=0.2, num_locations=5, pop_size=10, generations=5, mutation_rate=0.1,
+                 seed=None):
+        self.zones = load_zones(data_file)
 
         self.DISTANCE_THRESHOLD = distance_threshold
         self.NUM_LOCATIONS = num_locations
         self.POP_SIZE = pop_size
         self.GENERATIONS = generations
         self.MUTATION_RATE = mutation_rate
+        self.SEED = seed
 
         self.preprocess_data()
 
-    @staticmethod
-    def haversine_distance(lat1, lon1, lat2, lon2):
-        lat1, lon1, lat2, lon2 = map(math.radians, [lat1, lon1, lat2, lon2])
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
-        c = 2 * math.asin(math.sqrt(a))
-        r = 6371  # Radius of Earth in kilometers
-        return c * r
-
     def preprocess_data(self):
         self.I = list(range(len(self.zones)))
         self.population = {i: zone.get('population', 0) for i, zone in enumerate(self.zones)}
         self.poi_count = {i: zone.get('poi_number', 0) for i, zone in enumerate(self.zones)}
         print("Preprocessing data...")
-        self.coverage_matrix = self.compute_coverage_matrix()
-        print("Coverage matrix computed.")
-
-    def compute_coverage_matrix(self):
-        coverage = {}
-        for i in self.I:
-            for j in self.I:
-                dist = self.haversine_distance(
-                    self.zones[i]['latitude'], self.zones[i]['longitude'],
-                    self.zones[j]['latitude'], self.zones[j]['longitude']
-                )
-                coverage[(i, j)] = 1 if dist <= self.DISTANCE_THRESHOLD else 0
-        return coverage
+        self.neighbours = self.compute_neighbour_lists()
+        self.objective_weights = {
+            'population': [self.population[i] for i in self.I],
+            'poi': [self.poi_count[i] for i in self.I],
+        }
+        self.engine = PopulationEngine(self.objective_weights, self.NUM_LOCATIONS, self.neighbours,
+                                       mutation_rate=self.MUTATION_RATE, seed=self.SEED)
+        print("Coverage neighbour lists computed.")
+
+    def compute_neighbour_lists(self):
+        return neighbour_lists(*zone_coordinates(self.zones), self.DISTANCE_THRESHOLD)
 
     def fitness(self, solution):
-        selected_zones = [i for i, selected in enumerate(solution) if selected]
-        population_coverage = sum(self.population[i] for i in selected_zones)
-        poi_coverage = sum(self.poi_count[i] for i in selected_zones)
+        # Population and POIs of the zones within the distance threshold of a selected location
+        sites = [j for j, selected in enumerate(solution) if selected]
+        population_coverage, poi_coverage = self.engine.evaluate([sites])[0].tolist()
         return population_coverage, poi_coverage
 
     def initialize_population(self):
         print("\nInitializing population...")
-        population = []
-        for idx in range(self.POP_SIZE):
-            solution = [0] * len(self.I)
-            selected_indices = random.sample(self.I, self.NUM_LOCATIONS)
-            for index in selected_indices:
-                solution[index] = 1
-            population.append(solution)
-            print(f"Initial Solution {idx + 1}: {solution}")
+        population = self.engine.random_population(self.POP_SIZE)
+        for idx, solution in enumerate(population):
+            print(f"Initial Solution {idx + 1}: {self.to_solution(solution)}")
         return population
 
     def select_parents(self, population, fitness_values):
         print("\nSelecting parents...")
-        sorted_population = [x for _, x in sorted(zip(fitness_values, population), reverse=True)]
-        elite = sorted_population[:self.POP_SIZE // 10]
+        parents, elite = elitist_parents(self.engine, population, fitness_values, self.POP_SIZE)
         print("Elite solutions:")
         for idx, sol in enumerate(elite):
-            print(f"Elite {idx + 1}: {sol}")
-        return elite + random.choices(population, k=self.POP_SIZE - len(elite))
-
-    def crossover(self, parent1, parent2):
-        print("\nPerforming crossover...")
-        point = random.randint(1, len(parent1) - 1)
-        child1 = parent1[:point] + parent2[point:]
-        child2 = parent2[:point] + parent1[point:]
-        print(f"Parent 1: {parent1}")
-        print(f"Parent 2: {parent2}")
-        print(f"Child 1: {child1}")
-        print(f"Child 2: {child2}")
-        return child1, child2
-
-    def mutate(self, solution):
-        print("\nPerforming mutation...")
-        for i in range(len(solution)):
-            if random.random() < self.MUTATION_RATE:
-                solution[i] = 1 - solution[i]
-        print(f"Mutated solution: {solution}")
+            print(f"Elite {idx + 1}: {self.to_solution(sol)}")
+        return parents
+
+    def to_solution(self, sites):
+        """Convert a site-index individual to the 0/1 list over zones."""
+        solution = [0] * len(self.I)
+        for j in sites:
+            solution[int(j)] = 1
         return solution
 
     def optimize(self):
@@ -99,39 +127,114 @@ class ElitistGAOptimizer:
 
         for gen in range(self.GENERATIONS):
             print(f"\n--- Generation {gen + 1} ---")
-            fitness_values = [self.fitness(ind) for ind in population]
-            print(f"Fitness values: {fitness_values}")
+            # Fitness of the whole population in one matrix product
+            fitness_values = self.engine.evaluate(population)
 
-            for idx, (ind, fit) in enumerate(zip(population, fitness_values)):
-                print(f"Solution {idx + 1}: {ind}, Fitness: {fit}")
+            best = self.engine.lexicographic_order(fitness_values)[0]
+            if tuple(fitness_values[best]) > best_fitness:
+                best_fitness = tuple(fitness_values[best].tolist())
+                best_solution = self.to_solution(population[best])
 
             selected_parents = self.select_parents(population, fitness_values)
-
-            next_population = []
-            for i in range(0, len(selected_parents) - 1, 2):
-                child1, child2 = self.crossover(selected_parents[i], selected_parents[i + 1])
-                next_population.extend([child1, child2])
-
-            next_population = [self.mutate(ind) for ind in next_population]
-            population = next_population
-
-            for ind, fit in zip(population, fitness_values):
-                if fit > best_fitness:
-                    best_fitness = fit
-                    best_solution = ind
+            population = breed(self.engine, selected_parents)
 
             print(f"Best solution so far: {best_solution}, Fitness: {best_fitness}")
 
         print("\nOptimization complete.")
+        if self.engine.cache is not None:
+            print(f"Fitness cache: {self.engine.cache.stats()}")
         return best_solution, best_fitness
 
+    def optimize_islands(self, num_islands=4, migration_interval=10, migrants=1, workers=None):
+        """
+        Island model: num_islands populations of POP_SIZE evolve independently in worker processes
+        and every migration_interval generations each island sends copies of its best individuals
+        to the next island on a ring, where they replace the worst ones.
+
+        Island i draws from its own generator spawned from SEED, so a seeded run is reproducible
+        whatever the number of workers.
+        """
+        print(f"Starting island optimization with {num_islands} islands...\n")
+        seeds = np.random.SeedSequence(self.SEED).spawn(num_islands)
+        islands = []
+        engine_rng = self.engine.rng
+        for seed in seeds:
+            self.engine.rng = np.random.default_rng(seed)
+            islands.append({
+                'population': self.engine.random_population(self.POP_SIZE),
+                'rng_state': self.engine.rng.bit_generator.state,
+                'best_sites': None,
+                'best_fitness': (-float('inf'), -float('inf')),
+            })
+        self.engine.rng = engine_rng
+
+        worker_args = (self.objective_weights, self.NUM_LOCATIONS, self.neighbours, self.MUTATION_RATE)
+        pool = None
+        if (workers or num_islands) > 1:
+            pool = ProcessPoolExecutor(max_workers=min(workers or num_islands, num_islands),
+                                       initializer=_init_island_worker, initargs=worker_args)
+        else:
+            _init_island_worker(*worker_args)
+
+        try:
+            generation = 0
+            while generation < self.GENERATIONS:
+                epoch = min(migration_interval, self.GENERATIONS - generation)
+                for island in islands:
+                    island['generations'] = epoch
+                islands = list(pool.map(_evolve_island, islands)) if pool else [_evolve_island(i) for i in islands]
+                generation += epoch
+
+                # Ring migration: the best individuals of island i replace the worst of island i + 1
+                if generation < self.GENERATIONS:
+                    emigrants = []
+                    for island in islands:
+                        order = PopulationEngine.lexicographic_order(island['fitness'])
+                        emigrants.append(island['population'][order[:migrants]].copy())
+                    for i, island in enumerate(islands):
+                        order = PopulationEngine.lexicographic_order(island['fitness'])
+                        island['population'][order[len(order) - migrants:]] = emigrants[i - 1]
+
+                best_fitness = max(island['best_fitness'] for island in islands)
+                print(f"Generation {generation}/{self.GENERATIONS}, best fitness: {best_fitness}")
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        best_island = max(islands, key=lambda island: island['best_fitness'])
+        print("\nOptimization complete.")
+        return self.to_solution(best_island['best_sites']), best_island['best_fitness']
+
+    def polish(self, solution):
+        """Improve a solution with interchange local search on the covered population."""
+        selected = [i for i, selected in enumerate(solution) if selected]
+        weights = [self.population[i] for i in self.I]
+        improved = interchange(weights, site_coverage(self.neighbours), self.neighbours, selected)
+        polished = [0] * len(self.I)
+        for i in improved:
+            polished[i] = 1
+        return polished
+
 
 # Main execution
-def execEga(path):
+def execEga(path, islands=1):
 
     optimizer = ElitistGAOptimizer(path)
-    best_solution, best_fitness = optimizer.optimize()
+    if islands > 1:
+        # Independent populations on separate cores exchanging their best individuals,
+        # with migrations within the run's generations
+        best_solution, best_fitness = optimizer.optimize_islands(
+            num_islands=islands, migration_interval=max(1, optimizer.GENERATIONS // 2)
+        )
+    else:
+        best_solution, best_fitness = optimizer.optimize()
 
     print("\nBest Solution Found:")
     print(f"Fitness: {best_fitness}")
     print(f"Solution: {best_solution}")
+
+    # Swap sites while it improves the covered population
+    polished_solution = optimizer.polish(best_solution)
+    print("\nPolished Solution:")
+    print(f"Fitness: {optimizer.fitness(polished_solution)}")
+    print(f"Solution: {polished_solution}")
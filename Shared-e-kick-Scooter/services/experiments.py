@@ -0,0 +1,159 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from services.coverage import CoverageSweep, cached_distance_matrix
+from services.mclp import covering_model, extend_sites, solve_warm
+
+# Read-only zone data of the current worker process, set once by the pool initializer
+_worker_data = None
+# Coverage sweep of the worker process, built on its first sweep chunk
+_worker_sweep = None
+
+
+def available_cpus():
+    """
+    Number of CPUs this process may run on.
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _init_worker(zone_data):
+    global _worker_data, _worker_sweep
+    _worker_data = zone_data
+    _worker_sweep = None
+
+
+def solve_sweep(sweep, configurations, objectives, backend='highs'):
+    """
+    Solve consecutive (k, Dc) configurations of a sweep, warm starting every point from the previous one.
+
+    The sweep's coverage is extended in place to each threshold, and the previous optimal sites
+    (extended to k sites when k grows) are the start and lower bound of the next solve.
+
+    Args:
+        sweep (CoverageSweep): Coverage sweep over the zones, with the objectives as weights.
+        configurations (list): (number of locations, distance threshold) pairs, best in sweep order.
+        objectives (dict): Objective name -> per-zone weights.
+        backend (str): MCLP solver backend, 'highs', 'cpo' or 'greedy'.
+
+    Returns:
+        list: For every configuration, objective name -> solve_mclp style result with its cpu_time.
+    """
+    results = []
+    starts = {}
+    for num_locations, distance_threshold in configurations:
+        sweep.advance(distance_threshold)
+        model = covering_model(sweep.neighbours, num_locations, backend=backend)
+        result = {}
+        for obj_name, weights in objectives.items():
+            start_time = time.time()
+            start = starts.get(obj_name)
+            if start is not None:
+                start = extend_sites(weights, sweep.neighbours, start, num_locations)
+            solution = solve_warm(model, weights, start, sweep.upper_bound(obj_name, num_locations))
+            solution['cpu_time'] = time.time() - start_time
+            result[obj_name] = solution
+        starts = {
+            obj_name: solution['selected_locations']
+            for obj_name, solution in result.items() if solution['objective_value'] is not None
+        }
+        results.append(result)
+    return results
+
+
+def _solve_sweep_chunk(configurations):
+    """
+    Solve a contiguous chunk of a sweep with the coverage sweep of the worker process.
+    """
+    global _worker_sweep
+    if _worker_sweep is None:
+        # The distance matrix is read from the cache the parent process filled
+        distances = cached_distance_matrix(_worker_data['lats'], _worker_data['lons'])
+        _worker_sweep = CoverageSweep(distances, _worker_data['objectives'])
+    return solve_sweep(_worker_sweep, configurations, _worker_data['objectives'], _worker_data['backend'])
+
+
+class ExperimentExecutor:
+    """
+    Solves independent (objective, k, Dc) jobs in a pool of worker processes.
+
+    The zone coordinates and objective weights are sent to every worker once, when the pool
+    starts; a task only carries (k, Dc) configurations. Configurations are split into contiguous
+    chunks, so every worker reuses one model per configuration and warm starts along its chunk.
+    """
+
+    def __init__(self, lats, lons, objectives, backend='highs', max_workers=None):
+        """
+        Args:
+            lats, lons (array): Zone coordinates in degrees.
+            objectives (dict): Objective name -> per-zone weights.
+            backend (str): MCLP solver backend, 'highs', 'cpo' or 'greedy'.
+            max_workers (int): Number of worker processes, defaults to the number of available CPUs;
+                1 solves in-process.
+        """
+        self.zone_data = {
+            'lats': lats,
+            'lons': lons,
+            'objectives': {name: [float(w) for w in weights] for name, weights in objectives.items()},
+            'backend': backend,
+        }
+        self.max_workers = max_workers or available_cpus()
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, initializer=_init_worker, initargs=(self.zone_data,)
+            )
+        return self._pool
+
+    def run(self, jobs):
+        """
+        Solve a list of (objective, k, Dc) jobs.
+
+        Jobs are grouped by (k, Dc) configuration, in order of first appearance, and solved with run_sweep:
+        every configuration is one covering model in one worker, shared by all its objectives.
+
+        Returns:
+            list: One solve_mclp style result (with its cpu_time) per job, in submission order.
+        """
+        jobs = list(jobs)
+        configurations = list(dict.fromkeys((num_locations, threshold) for _, num_locations, threshold in jobs))
+        solutions = dict(zip(configurations, self.run_sweep(configurations)))
+        return [solutions[(num_locations, threshold)][obj_name] for obj_name, num_locations, threshold in jobs]
+
+    def run_sweep(self, configurations):
+        """
+        Solve the (k, Dc) configurations of a sweep, in order, as one contiguous chunk per worker.
+
+        With a single worker the whole sweep runs in-process and every point is warm started;
+        otherwise only the first point of each chunk is solved from scratch.
+
+        Returns:
+            list: For every configuration, objective name -> result with its cpu_time (see solve_sweep).
+        """
+        configurations = list(configurations)
+        if not configurations:
+            return []
+        if self.max_workers == 1:
+            _init_worker(self.zone_data)
+            return _solve_sweep_chunk(configurations)
+
+        num_chunks = min(self.max_workers, len(configurations))
+        bounds = [len(configurations) * c // num_chunks for c in range(num_chunks + 1)]
+        chunks = [configurations[start:end] for start, end in zip(bounds, bounds[1:])]
+        return [result for chunk in self._get_pool().map(_solve_sweep_chunk, chunks) for result in chunk]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
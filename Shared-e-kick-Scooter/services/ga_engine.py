@@ -0,0 +1,166 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from services.coverage import BitsetCoverage
+
+
+class FitnessCache:
+    """
+    Bounded LRU cache of fitness values keyed by the canonical form of an individual
+    (the sorted tuple of its sites), with hit-rate statistics.
+    """
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self.entries),
+        }
+
+
+class PopulationEngine:
+    """
+    Genetic algorithm operators on a whole population at once.
+
+    The population is a 2-D integer array (individuals x num_locations) of distinct, sorted site indices,
+    so every individual is a feasible k-site plan. Fitness of all individuals is read from the packed
+    site coverage bitsets (see BitsetCoverage), and crossover and mutation are masks drawn from
+    a seeded numpy.random.Generator, so a run is reproducible.
+    """
+
+    def __init__(self, weights, num_locations, neighbours=None, num_sites=None, mutation_rate=0.1, seed=None,
+                 cache_size=100000):
+        """
+        Args:
+            weights (dict): Objective name -> per-zone weights, in the order of the fitness columns.
+            num_locations (int): Number of sites selected by a random individual.
+            neighbours (list): For every zone, the sites covering it; None scores the selected zones themselves.
+            num_sites (int): Number of candidate sites, defaults to the number of zones.
+            mutation_rate (float): Probability of swapping each selected site.
+            seed (int): Seed of the random generator.
+            cache_size (int): Number of fitness values kept in the LRU cache, 0 disables it.
+        """
+        self.objective_names = list(weights)
+        num_zones = len(weights[self.objective_names[0]])
+        self.num_sites = num_zones if num_sites is None else num_sites
+        self.num_locations = num_locations
+        self.mutation_rate = mutation_rate
+        self.rng = np.random.default_rng(seed)
+        self.cache = FitnessCache(cache_size) if cache_size else None
+
+        if neighbours is None:
+            # Every site only covers its own zone
+            neighbours = [[i] for i in range(num_zones)]
+        self.coverage = BitsetCoverage(neighbours, weights, self.num_sites)
+
+    def covered(self, population):
+        """
+        Boolean (individuals x zones) matrix of the zones covered by every individual.
+        """
+        return self.coverage.to_bool(self.coverage.covered(population))
+
+    def evaluate(self, population):
+        """
+        Fitness of every individual: (individuals x objectives) array of covered weights.
+
+        Elite copies and duplicate individuals are answered from the fitness cache; only the
+        distinct uncached individuals are scored from the bitsets.
+        """
+        population = np.asarray(population)
+        if self.cache is None:
+            return self.coverage.weighted_sums(self.coverage.covered(population))
+
+        fitness = np.empty((len(population), len(self.objective_names)))
+        missing = {}  # individual -> rows of the population holding it
+        for row, key in enumerate(map(tuple, population.tolist())):
+            if key in missing:
+                self.cache.hits += 1
+                missing[key].append(row)
+                continue
+            value = self.cache.get(key)
+            if value is None:
+                missing[key] = [row]
+            else:
+                fitness[row] = value
+        if missing:
+            rows = [rows[0] for rows in missing.values()]
+            values = self.coverage.weighted_sums(self.coverage.covered(population[rows]))
+            for (key, rows), value in zip(missing.items(), values):
+                fitness[rows] = value
+                self.cache.put(key, tuple(value.tolist()))
+        return fitness
+
+    def repair(self, preferred, fallback=None):
+        """
+        Build individuals of exactly num_locations distinct sites, sorted in increasing order.
+
+        Distinct preferred sites are kept first, then missing sites are drawn from the fallback
+        sites (e.g. the other parent), then from all remaining sites, in random order.
+        """
+        keys = 2 + self.rng.random((len(preferred), self.num_sites))
+        if fallback is not None:
+            np.put_along_axis(keys, fallback, 1 + self.rng.random(fallback.shape), axis=1)
+        np.put_along_axis(keys, preferred, self.rng.random(preferred.shape), axis=1)
+        chosen = np.argpartition(keys, self.num_locations - 1, axis=1)[:, :self.num_locations]
+        return np.sort(chosen, axis=1)
+
+    def random_population(self, pop_size):
+        """
+        Individuals with exactly num_locations distinct random sites each.
+        """
+        return self.repair(np.zeros((pop_size, 0), dtype=np.int64))
+
+    def uniform_crossover(self, parents1, parents2):
+        """
+        Take every gene from either parent with equal probability, then repair the children back to size k.
+
+        The two children get complementary genes; a site lost to a duplicate is replaced by one of the parents' other sites.
+        """
+        parents1, parents2 = np.asarray(parents1), np.asarray(parents2)
+        from_first = self.rng.random(parents1.shape) < 0.5
+        child1 = np.where(from_first, parents1, parents2)
+        child2 = np.where(from_first, parents2, parents1)
+        both = np.concatenate([parents1, parents2], axis=1)
+        return self.repair(child1, both), self.repair(child2, both)
+
+    def swap_mutate(self, population):
+        """
+        Swap every selected site with probability mutation_rate for a random site outside the individual.
+        """
+        population = np.asarray(population)
+        mutated = self.rng.random(population.shape) < self.mutation_rate
+        replacements = self.rng.integers(0, self.num_sites, size=population.shape)
+        # A replacement already in the individual is a duplicate, repair fills it with another random site
+        return self.repair(np.where(mutated, replacements, population))
+
+    @staticmethod
+    def lexicographic_order(fitness):
+        """
+        Indices of the individuals sorted by decreasing fitness tuple.
+        """
+        fitness = np.asarray(fitness)
+        return np.lexsort(fitness.T[::-1])[::-1]
@@ -0,0 +1,178 @@
+import heapq
+
+import numpy as np
+
+
+def site_coverage(neighbours, num_sites=None):
+    """
+    Invert the zone neighbour lists: for every site, the indices of the zones it covers.
+    """
+    num_sites = len(neighbours) if num_sites is None else num_sites
+    covering = [[] for _ in range(num_sites)]
+    for i, sites in enumerate(neighbours):
+        for j in sites:
+            covering[int(j)].append(i)
+    return [np.array(zones, dtype=np.int64) for zones in covering]
+
+
+def lazy_greedy(weights, covering, num_locations, initial=None):
+    """
+    Lazy greedy (CELF) maximal covering heuristic.
+
+    Weighted coverage is monotone submodular, so a site's marginal gain can only shrink as sites
+    are added. Stale gains in the priority queue are therefore upper bounds: only the top site is
+    re-evaluated, and it is selected as soon as its refreshed gain is still the largest.
+    The result is within (1 - 1/e) of the optimum.
+
+    Args:
+        weights (array): Objective weight of every zone.
+        covering (list): For every site, the zones it covers (see site_coverage).
+        num_locations (int): Number of sites to select.
+        initial (list): Sites that are selected before the greedy steps, e.g. a smaller solution.
+
+    Returns:
+        list: Selected site indices, in the order they were added.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    covered = np.zeros(len(weights), dtype=bool)
+    selected = []
+    for j in (initial or [])[:num_locations]:
+        selected.append(int(j))
+        covered[covering[int(j)]] = True
+
+    chosen = set(selected)
+    # Entries are (-gain, site, number of selected sites when the gain was computed)
+    queue = [(-float(weights[zones].sum()), j, -1) for j, zones in enumerate(covering) if j not in chosen]
+    heapq.heapify(queue)
+    while len(selected) < num_locations and queue:
+        _, j, evaluated_at = heapq.heappop(queue)
+        if evaluated_at == len(selected):
+            selected.append(j)
+            covered[covering[j]] = True
+            continue
+        zones = covering[j]
+        gain = float(weights[zones[~covered[zones]]].sum())
+        heapq.heappush(queue, (-gain, j, len(selected)))
+    return selected
+
+
+class GreedyCoveringModel:
+    """
+    Maximal covering location problem solved with the lazy greedy heuristic.
+
+    Has the interface of the exact covering models, so it can be used as the 'greedy' backend
+    for fast what-if answers; the result is not proven optimal. With local_search the greedy
+    solution is improved by interchange (the 'interchange' backend).
+    """
+
+    def __init__(self, neighbours, num_locations, num_sites=None, time_limit=None, local_search=False):
+        self.neighbours = neighbours
+        self.num_locations = num_locations
+        self.local_search = local_search
+        self.covering = site_coverage(neighbours, num_sites)
+
+    def solve(self, weights, start=None, lower_bound=None):
+        weights = np.asarray(weights, dtype=np.float64)
+        selected_locations = sorted(lazy_greedy(weights, self.covering, self.num_locations))
+        if self.local_search:
+            selected_locations = interchange(weights, self.covering, self.neighbours, selected_locations)
+        covered = np.zeros(len(weights), dtype=bool)
+        for j in selected_locations:
+            covered[self.covering[j]] = True
+        value = float(weights[covered].sum())
+
+        # A warm start can be better than the greedy solution
+        if start is not None:
+            start_covered = np.zeros(len(weights), dtype=bool)
+            for j in start:
+                start_covered[self.covering[int(j)]] = True
+            if weights[start_covered].sum() > value:
+                selected_locations = sorted(int(j) for j in start)
+                covered = start_covered
+                value = float(weights[covered].sum())
+
+        return {
+            'status': 'heuristic',
+            'objective_value': value,
+            'selected_locations': selected_locations,
+            'covered_zones': np.flatnonzero(covered).tolist()
+        }
+
+
+def interchange(weights, covering, neighbours, selected_locations, max_passes=50):
+    """
+    Teitz-Bart interchange local search: swap a selected site for an unselected one while it improves coverage.
+
+    Per-zone coverage counts make every swap's objective change incremental instead of a rescan of all zones:
+    - gain[a]: weight of the uncovered zones that site a would cover,
+    - loss[r]: weight of the zones covered only by the selected site r,
+    - swapping r for a changes the objective by gain[a] - loss[r] plus the weight of a's zones that only r covers,
+      whose single covering site is read in O(1) from the XOR of the covering site ids.
+
+    Args:
+        weights (array): Objective weight of every zone.
+        covering (list): For every site, the zones it covers (see site_coverage).
+        neighbours (list): For every zone, the sites covering it.
+        selected_locations (list): Starting solution, e.g. from a solver, the GA or lazy_greedy.
+        max_passes (int): Maximum number of passes over the unselected sites.
+
+    Returns:
+        list: Improved selected site indices, same size as the start.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    neighbours = [np.asarray(sites, dtype=np.int64) for sites in neighbours]
+    num_sites = len(covering)
+    count = np.zeros(len(weights), dtype=np.int64)
+    owner = np.zeros(len(weights), dtype=np.int64)  # XOR of the selected sites covering a zone
+    gain = np.array([weights[zones].sum() for zones in covering], dtype=np.float64)
+    loss = np.zeros(num_sites, dtype=np.float64)
+    selected = set()
+
+    def add(a):
+        selected.add(a)
+        for i in covering[a].tolist():
+            if count[i] == 0:
+                gain[neighbours[i]] -= weights[i]
+                loss[a] += weights[i]
+            elif count[i] == 1:
+                loss[owner[i]] -= weights[i]
+            count[i] += 1
+            owner[i] ^= a
+
+    def remove(r):
+        selected.discard(r)
+        for i in covering[r].tolist():
+            count[i] -= 1
+            owner[i] ^= r
+            if count[i] == 0:
+                gain[neighbours[i]] += weights[i]
+            elif count[i] == 1:
+                loss[owner[i]] += weights[i]
+        loss[r] = 0.0
+
+    for j in selected_locations:
+        add(int(j))
+
+    tolerance = 1e-9 * max(1.0, float(weights.sum()))
+    for _ in range(max_passes):
+        improved = False
+        for a in range(num_sites):
+            if a in selected or gain[a] <= 0:
+                continue
+            # Zones of a covered only by r stay covered after swapping r for a
+            shared = {}
+            for i in covering[a].tolist():
+                if count[i] == 1:
+                    shared[int(owner[i])] = shared.get(int(owner[i]), 0.0) + weights[i]
+            best_site, best_delta = None, tolerance
+            for r in selected:
+                delta = gain[a] - loss[r] + shared.get(r, 0.0)
+                if delta > best_delta:
+                    best_site, best_delta = r, delta
+            if best_site is not None:
+                remove(best_site)
+                add(a)
+                improved = True
+        if not improved:
+            break
+    return sorted(selected)
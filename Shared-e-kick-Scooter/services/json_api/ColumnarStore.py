@@ -0,0 +1,129 @@
+import json
+
+import numpy as np
+
+
+# Per-zone columns and the numeric type they are stored with
+ZONE_COLUMNS = {
+    "latitude": np.float64,
+    "longitude": np.float64,
+    "population": np.int64,
+    "poi_number": np.int64,
+    "bus_station_number": np.int64,
+    "metro_station_number": np.int64,
+}
+# Per-stop columns, one table for each stop list of a zone
+STOP_KINDS = ["pois", "bus_stations", "metro_stations"]
+STOP_NUMERIC_COLUMNS = {
+    "latitude": np.float64,
+    "longitude": np.float64,
+    "distance_to_center": np.float64,
+    "osm_id": np.int64,
+}
+STOP_TEXT_COLUMNS = ["name", "poi_type"]
+
+
+def export_columnar(data, path):
+    """
+    Write the neighbourhood list as a NumPy .npz archive with one array per column.
+
+    Zones are stored as arrays indexed by zone id; every stop kind is a flat table whose
+    "<kind>/zone" column holds the id of the zone the stop belongs to.
+
+    Parameters:
+        data (list): Neighbourhood entries as stored in database.json.
+        path (str): Destination .npz file.
+    """
+    arrays = {"zone/neighbourhood": np.array([zone.get("neighbourhood") or "" for zone in data], dtype=str)}
+    for column, dtype in ZONE_COLUMNS.items():
+        missing = np.nan if dtype is np.float64 else 0
+        arrays[f"zone/{column}"] = np.array(
+            [missing if zone.get(column) is None else zone[column] for zone in data], dtype=dtype
+        )
+
+    for kind in STOP_KINDS:
+        stops = [(zone_id, stop) for zone_id, zone in enumerate(data) for stop in zone.get(kind, [])]
+        arrays[f"{kind}/zone"] = np.array([zone_id for zone_id, _ in stops], dtype=np.int64)
+        for column, dtype in STOP_NUMERIC_COLUMNS.items():
+            missing = np.nan if dtype is np.float64 else -1
+            arrays[f"{kind}/{column}"] = np.array(
+                [missing if stop.get(column) is None else stop[column] for _, stop in stops], dtype=dtype
+            )
+        for column in STOP_TEXT_COLUMNS:
+            arrays[f"{kind}/{column}"] = np.array([stop.get(column) or "" for _, stop in stops], dtype=str)
+
+    with open(path, "wb") as f:
+        np.savez_compressed(f, **arrays)
+    print(f"Columnar database saved: {path}")
+
+
+class ColumnarDatabase:
+    """
+    Lazy reader for archives written by export_columnar.
+
+    Columns are only read from disk when first accessed, so a consumer that needs
+    coordinates and populations never parses the POI names.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._archive = np.load(path, allow_pickle=False)
+        self._columns = {}
+
+    def __getitem__(self, name):
+        """
+        Return a column by its "<table>/<column>" name, e.g. "zone/latitude" or "pois/zone".
+        """
+        if name not in self._columns:
+            self._columns[name] = self._archive[name]
+        return self._columns[name]
+
+    def __len__(self):
+        return len(self["zone/latitude"])
+
+    def to_zones(self, zone_columns=("neighbourhood", "latitude", "longitude", "population", "poi_number"),
+                 stop_columns=("distance_to_center",), stop_kinds=("bus_stations", "metro_stations")):
+        """
+        Rebuild zone dictionaries in the database.json layout from the requested columns only.
+
+        Parameters:
+            zone_columns (tuple): Zone columns to include.
+            stop_columns (tuple): Stop columns to include in every stop dictionary.
+            stop_kinds (tuple): Stop lists to rebuild.
+
+        Returns:
+            list: One dictionary per zone.
+        """
+        zones = [{} for _ in range(len(self))]
+        for column in zone_columns:
+            values = self[f"zone/{column}"].tolist()
+            for zone, value in zip(zones, values):
+                zone[column] = None if isinstance(value, float) and value != value else value
+
+        for kind in stop_kinds:
+            for zone in zones:
+                zone[kind] = []
+            zone_ids = self[f"{kind}/zone"].tolist()
+            values = {column: self[f"{kind}/{column}"].tolist() for column in stop_columns}
+            for position, zone_id in enumerate(zone_ids):
+                zones[zone_id][kind].append({column: values[column][position] for column in stop_columns})
+        return zones
+
+    def close(self):
+        self._archive.close()
+
+
+def load_zones(data_file):
+    """
+    Load the zone list from either database.json or a columnar .npz archive.
+
+    For archives only the columns used by the optimizers are read: name, coordinates,
+    population, POI count and the distance of every bus and metro station.
+    """
+    if data_file.endswith(".npz"):
+        database = ColumnarDatabase(data_file)
+        zones = database.to_zones()
+        database.close()
+        return zones
+    with open(data_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
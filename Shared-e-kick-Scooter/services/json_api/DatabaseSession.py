@@ -0,0 +1,99 @@
+import json
+import os
+import tempfile
+
+
+class DatabaseSession:
+    """
+    In-memory view of the JSON database.
+
+    The file is parsed once on first access, every update stage mutates the same list,
+    and commit() writes it back once through a temporary file and an atomic rename.
+    """
+
+    def __init__(self, path, autocommit=False):
+        """
+        Parameters:
+            path (str): Path to the JSON database file.
+            autocommit (bool): Write the file at every checkpoint() instead of only on commit().
+        """
+        self.path = path
+        self.autocommit = autocommit
+        self.dirty = False
+        self._data = None
+
+    @property
+    def data(self):
+        """
+        The neighbourhood list, loaded from disk on first access (empty if the file does not exist yet).
+        """
+        if self._data is None:
+            if os.path.exists(self.path):
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self._data = json.load(f)
+            else:
+                self._data = []
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+        self.dirty = True
+
+    def mark_dirty(self):
+        """
+        Record that the in-memory data was mutated in place.
+        """
+        self.dirty = True
+
+    def checkpoint(self):
+        """
+        End of an update stage: writes the file only for autocommit sessions.
+        """
+        if self.autocommit:
+            self.commit()
+
+    def commit(self):
+        """
+        Write the data once, crash-safe: a temporary file in the same directory is renamed over the database.
+        """
+        if not self.dirty or self._data is None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".database-", suffix=".json.tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, ensure_ascii=False, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        self.dirty = False
+
+    def rollback(self):
+        """
+        Discard the in-memory changes; the data is reloaded from disk on next access.
+        """
+        self._data = None
+        self.dirty = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+
+
+def as_session(database):
+    """
+    Return database itself if it is a DatabaseSession, otherwise a session on the given path
+    that writes at every checkpoint, so functions keep working with plain file paths.
+    """
+    if isinstance(database, DatabaseSession):
+        return database
+    return DatabaseSession(database, autocommit=True)
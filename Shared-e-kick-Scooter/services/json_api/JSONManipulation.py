@@ -1,8 +1,9 @@
 import pandas as pd
-import json
 
+from services.json_api.DatabaseSession import as_session
 from services.localize_char.LocalizeChar import tr_upper
-from services.nominatim.Nominatim import get_address_from_lat_lon
+from services.nominatim.Nominatim import get_address_from_lat_lon, get_geocode_cache, prefetch_addresses
+from services.spatial_index.NeighbourhoodIndex import normalize_neighbourhood_name
 
 
 # BaseInfo Interface and Derived Classes
@@ -32,8 +33,12 @@ class MetroStation(BaseInfo):
 def initialize_json(output_file):
     """
     Create an initial JSON structure with all values set to None or empty.
+
+    Parameters:
+        output_file (str | DatabaseSession): Path to the JSON file or an open database session.
     """
-    data = [
+    session = as_session(output_file)
+    session.data = [
         {
             "neighbourhood": None,
             "latitude": None,
@@ -49,83 +54,211 @@ def initialize_json(output_file):
     ]
 
     # Save to JSON
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
+    session.checkpoint()
+
+    print(f"Initial JSON created: {session.path}")
+
+def get_neighbourhood_from_address(address):
+    """
+    Extract the upper-cased neighbourhood name from a reverse-geocoded address.
+
+    Parameters:
+        address (str): Address returned by get_address_from_lat_lon.
+
+    Returns:
+        str: First word of the neighbourhood part of the address, or None if the address has no such part.
+    """
+    if not address:
+        return None
+    parts = address.split(",")
+    if len(parts) < 6:
+        return None
+    # Extract the neighbourhood part (6th from the end) and keep its first word
+    neighborhood_name = parts[-6].strip().split(" ")[0]
+    return tr_upper(neighborhood_name) if neighborhood_name else None
+
+
+def assign_stops_to_neighbourhoods(neighborhood_data, stops, neighbourhood_index=None, addresses=None):
+    """
+    Resolve the neighbourhood of every stop exactly once and bucket the stops by neighbourhood.
+
+    Parameters:
+        neighborhood_data (list): Neighbourhood entries of the database.
+        stops (list): Stops returned by the TransportMap.
+        neighbourhood_index (NeighbourhoodIndex): Optional offline polygon index; when omitted
+            the neighbourhood is extracted from a reverse-geocoded address.
+        addresses (dict): Optional geocoding cache key -> address, as returned by prefetch_addresses;
+            only stops missing from it are reverse-geocoded.
+
+    Returns:
+        dict: Neighbourhood position in neighborhood_data -> list of stops located in it.
+    """
+    relevant_stops = {index: [] for index in range(len(neighborhood_data))}
+    matches_by_name = {}
+    addresses = addresses or {}
+    cache = get_geocode_cache()
+    if neighbourhood_index is not None:
+        # Polygon names are matched exactly against the normalized database names
+        positions_by_name = {}
+        for index, neighborhood in enumerate(neighborhood_data):
+            positions_by_name.setdefault(normalize_neighbourhood_name(neighborhood["neighbourhood"]), []).append(index)
+
+    for step, stop in enumerate(stops):
+        if neighbourhood_index is not None:
+            polygon_name = neighbourhood_index.assign(stop["latitude"], stop["longitude"])
+            if polygon_name is not None:
+                for index in positions_by_name.get(normalize_neighbourhood_name(polygon_name), []):
+                    relevant_stops[index].append(stop)
+            continue
+
+        # Get the address for the bus stop
+        address = addresses.get(cache.key(stop["latitude"], stop["longitude"]))
+        if address is None:
+            address = get_address_from_lat_lon(stop["latitude"], stop["longitude"])
+        neighborhood_name_from_address = get_neighbourhood_from_address(address)
+        print("------------------STEP------------------")
+        print(step)
+        print("address {}".format(address))
+        if neighborhood_name_from_address is None:
+            print("neighborhood could not be extracted from the address")
+            continue
+        print("neighborhood_name_from_address {}".format(neighborhood_name_from_address))
+
+        # Neighbourhoods matching an extracted name are looked up once and memoized
+        if neighborhood_name_from_address not in matches_by_name:
+            matches_by_name[neighborhood_name_from_address] = [
+                index for index, neighborhood in enumerate(neighborhood_data)
+                if neighborhood_name_from_address in tr_upper(neighborhood["neighbourhood"] or "")
+            ]
+        matched_indices = matches_by_name[neighborhood_name_from_address]
+        for index in matched_indices:
+            relevant_stops[index].append(stop)
+        print("matched {}".format([neighborhood_data[index]["neighbourhood"] for index in matched_indices]))
+        print("-------------------------------------")
+    return relevant_stops
+
+
+def add_stops_to_neighbourhoods(neighborhood_data, relevant_stops, stop_type):
+    """
+    Append bucketed stops to their neighbourhoods and update the matching counters.
+
+    Parameters:
+        neighborhood_data (list): Neighbourhood entries of the database.
+        relevant_stops (dict): Output of assign_stops_to_neighbourhoods.
+        stop_type (str): Bus Metro Or POI.
+    """
+    for index, neighborhood in enumerate(neighborhood_data):
+        if stop_type == "bus":
+            neighborhood["bus_station_number"] += len(relevant_stops[index])
+            neighborhood["bus_stations"].extend(relevant_stops[index])
+        elif stop_type == "metro":
+            neighborhood["metro_station_number"] += len(relevant_stops[index])
+            neighborhood["metro_stations"].extend(relevant_stops[index])
+        elif stop_type == "poi":
+            neighborhood["poi_number"] += len(relevant_stops[index])
+            neighborhood["pois"].extend(relevant_stops[index])
 
-    print(f"Initial JSON created: {output_file}")
 
-def generate_json_and_map(json_file, transport_map, stop_type, color, icon, poi_type=None):
+def generate_json_and_map(json_file, transport_map, stop_type, color, icon, poi_type=None, neighbourhood_index=None):
     """
     Update the bus stop values in the JSON file with data from the TransportMap.
 
     Parameters:
-        json_file (str): Path to the JSON file to update.
+        json_file (str | DatabaseSession): Path to the JSON file to update or an open database session.
         transport_map (TransportMap): Instance of TransportMap to fetch bus stop data.
         stop_type (str): Bus Metro Or POI.
         color (str): Color of the icon.
         icon (str): Icon of the icon .
         poi_type (str): Type of poi (POI).
+        neighbourhood_index (NeighbourhoodIndex): Optional offline polygon index used instead of reverse geocoding.
     """
     if stop_type != "bus" and stop_type != "metro" and stop_type != "poi":
         print("Wrong parameter in generate_json_and_map function")
     try:
         # Load the existing JSON file
-        with open(json_file, "r", encoding="utf-8") as f:
-            neighborhood_data = json.load(f)
+        session = as_session(json_file)
+        neighborhood_data = session.data
 
         # Fetch bus stops from the transport map
         stops = transport_map.add_transport_stops(stop_type, color, icon,  poi_type)  # Returns bus stop data
-        # Update the JSON with bus stop data
-        for neighborhood in neighborhood_data:
-            relevant_stops = []
-            step = 0
+        if poi_type is not None:
             for stop in stops:
-                latitude = stop["latitude"]
-                longitude = stop["longitude"]
-                if poi_type is not None:
-                    stop['poi_type'] = poi_type
-                # Get the address for the bus stop
-                address = get_address_from_lat_lon(latitude, longitude)
-                if address:
-                    # Match the neighborhood from address with the neighborhood in the JSON
-                    print("------------------STEP------------------")
-                    print(step)
-                    print("address {}".format(address))
-                    # Extract the neighborhood from the address (assume the neighborhood is in the address)
-                    neighborhood_name_from_address = address.split(",")[
-                        -6].strip()  # Extract the 4th part (adjust if needed)
-                    neighborhood_name_from_address = neighborhood_name_from_address.split(" ")[0]
-                    print("neighborhood_name_from_address {}".format(neighborhood_name_from_address))
-                    if tr_upper(neighborhood_name_from_address) in tr_upper(neighborhood["neighbourhood"]):
-                        print("matched")
-                        print("neighborhood")
-                        print(neighborhood)
-                        relevant_stops.append(stop)
-                    else:
-                        print("not matched")
-                        print("neighborhood")
-                        print(neighborhood)
-                    print("-------------------------------------")
-                    step += 1
-            # Update the neighborhood with relevant bus stops
-            print("relevant_stops")
-            print(relevant_stops)
-            if stop_type == "bus":
-                neighborhood["bus_station_number"] += len(relevant_stops)
-                neighborhood["bus_stations"].extend(relevant_stops)
-            elif stop_type == "metro":
-                neighborhood["metro_station_number"] += len(relevant_stops)
-                neighborhood["metro_stations"].extend(relevant_stops)
-            elif stop_type == "poi":
-                neighborhood["poi_number"] += len(relevant_stops)
-                neighborhood["pois"].extend(relevant_stops)
-            print("neighborhood")
-            print(neighborhood)
+                stop['poi_type'] = poi_type
+
+        # Update the JSON with bus stop data
+        relevant_stops = assign_stops_to_neighbourhoods(neighborhood_data, stops, neighbourhood_index)
+        add_stops_to_neighbourhoods(neighborhood_data, relevant_stops, stop_type)
+
         # Save the updated JSON file
-        with open(json_file, "w", encoding="utf-8") as f:
-            json.dump(neighborhood_data, f, ensure_ascii=False, indent=4)
+        session.mark_dirty()
+        session.checkpoint()
 
-        print(f"Stops added and JSON updated: {json_file}")
+        print(f"Stops added and JSON updated: {session.path}")
+        print(f"Reverse geocoding cache: {get_geocode_cache().stats()}")
 
     except Exception as e:
         print(f"An error occurred while updating bus stops: {str(e)}")
+
+
+def generate_json_and_map_batch(json_file, transport_map, stop_types, styles, poi_types=None, neighbourhood_index=None,
+                                fetcher=None):
+    """
+    Update the JSON file with several stop types fetched through one combined Overpass query.
+
+    Parameters:
+        json_file (str | DatabaseSession): Path to the JSON file to update or an open database session.
+        transport_map (TransportMap): Instance of TransportMap to fetch the stop data.
+        stop_types (list): Any of "bus", "metro" and "poi".
+        styles (dict): Stop type -> (color, icon) used for the markers.
+        poi_types (list): Types of poi (POI) fetched when "poi" is requested.
+        neighbourhood_index (NeighbourhoodIndex): Optional offline polygon index used instead of reverse geocoding.
+        fetcher (AsyncFetcher): Optional fetch layer; when given, the Overpass request goes through it and all
+            stops are reverse-geocoded in one batch before being assigned.
+
+    Returns:
+        bool: True when every stop type was added, False when the update stopped on an error.
+    """
+    try:
+        # Load the existing JSON file
+        session = as_session(json_file)
+        neighborhood_data = session.data
+
+        # Fetch every requested stop type with a single request
+        stops_by_type = transport_map.add_transport_stops_batch(stop_types, styles, poi_types, fetcher=fetcher)
+
+        stops_per_type = {}
+        for stop_type in stop_types:
+            if stop_type == "poi":
+                stops_per_type["poi"] = []
+                for poi_type, poi_stops in stops_by_type["poi"].items():
+                    for stop in poi_stops:
+                        stop['poi_type'] = poi_type
+                    stops_per_type["poi"].extend(poi_stops)
+            else:
+                stops_per_type[stop_type] = stops_by_type[stop_type]
+
+        addresses = None
+        if fetcher is not None and neighbourhood_index is None:
+            # Nominatim's usage policy allows one request per second, so the batch runs serially,
+            # but the Overpass and geocoding requests share one event loop and cache pass
+            addresses = prefetch_addresses(
+                [(stop["latitude"], stop["longitude"]) for stops in stops_per_type.values() for stop in stops],
+                fetcher
+            )
+
+        # Update the JSON with the stop data
+        for stop_type, stops in stops_per_type.items():
+            relevant_stops = assign_stops_to_neighbourhoods(neighborhood_data, stops, neighbourhood_index, addresses)
+            add_stops_to_neighbourhoods(neighborhood_data, relevant_stops, stop_type)
+
+        # Save the updated JSON file
+        session.mark_dirty()
+        session.checkpoint()
+
+        print(f"Stops added and JSON updated: {session.path}")
+        print(f"Reverse geocoding cache: {get_geocode_cache().stats()}")
+        return True
+
+    except Exception as e:
+        print(f"An error occurred while updating stops: {str(e)}")
+        return False
@@ -0,0 +1,260 @@
+from functools import partial
+
+import numpy as np
+
+from services.heuristics import GreedyCoveringModel, lazy_greedy, site_coverage
+
+
+def covered_zones_of(neighbours, selected_locations):
+    """
+    Zones covered by at least one selected location.
+    """
+    selected = set(int(j) for j in selected_locations)
+    return [i for i, sites in enumerate(neighbours) if any(int(j) in selected for j in sites)]
+
+
+def _empty_result(status):
+    return {
+        'status': status,
+        'objective_value': None,
+        'selected_locations': [],
+        'covered_zones': []
+    }
+
+
+class HighsCoveringModel:
+    """
+    Maximal covering location problem solved with scipy's MILP interface (HiGHS).
+
+    Linear formulation over x_j (site j selected) and y_i (zone i covered):
+        maximize sum_i w_i y_i  s.t.  y_i <= sum_{j in N(i)} x_j,  sum_j x_j = k,  x, y binary.
+
+    The constraint matrices are assembled once; solving another objective only replaces the cost vector.
+    scipy's milp takes no MIP start, so a warm start is passed on as a lower bound on the objective.
+    """
+
+    def __init__(self, neighbours, num_locations, num_sites=None, time_limit=None):
+        from scipy.optimize import Bounds, LinearConstraint
+        from scipy.sparse import csr_matrix
+
+        self.neighbours = neighbours
+        self.num_zones = len(neighbours)
+        self.num_sites = self.num_zones if num_sites is None else num_sites
+        self.options = {} if time_limit is None else {'time_limit': time_limit}
+
+        # Columns: x_0 .. x_{m-1}, then y_0 .. y_{n-1}
+        rows, cols, values = [], [], []
+        for i, sites in enumerate(neighbours):
+            rows.append(i)
+            cols.append(self.num_sites + i)
+            values.append(1.0)
+            for j in sites:
+                rows.append(i)
+                cols.append(int(j))
+                values.append(-1.0)
+        coverage = csr_matrix((values, (rows, cols)), shape=(self.num_zones, self.num_sites + self.num_zones))
+        cardinality = csr_matrix(np.concatenate([np.ones(self.num_sites), np.zeros(self.num_zones)])[None, :])
+
+        self.constraints = [
+            LinearConstraint(coverage, -np.inf, 0.0),
+            LinearConstraint(cardinality, num_locations, num_locations),
+        ]
+        self.integrality = np.ones(self.num_sites + self.num_zones)
+        self.bounds = Bounds(0, 1)
+
+    def solve(self, weights, start=None, lower_bound=None):
+        from scipy.optimize import LinearConstraint, milp
+
+        weights = np.asarray(weights, dtype=np.float64)
+        cost = np.concatenate([np.zeros(self.num_sites), -weights])
+        constraints = self.constraints
+        if lower_bound is not None:
+            # Objective cut: the optimum is at least as good as the known solution, relaxed by a rounding margin
+            margin = 1e-6 * max(1.0, abs(lower_bound))
+            constraints = constraints + [LinearConstraint(-cost[None, :], lower_bound - margin, np.inf)]
+        result = milp(
+            c=cost,
+            constraints=constraints,
+            integrality=self.integrality,
+            bounds=self.bounds,
+            options=self.options
+        )
+        if result.x is None:
+            return _empty_result(result.message)
+
+        selected_locations = [j for j in range(self.num_sites) if result.x[j] > 0.5]
+        covered_zones = covered_zones_of(self.neighbours, selected_locations)
+        return {
+            'status': 'optimal' if result.success else result.message,
+            'objective_value': float(sum(weights[i] for i in covered_zones)),
+            'selected_locations': selected_locations,
+            'covered_zones': covered_zones
+        }
+
+
+class CpoCoveringModel:
+    """
+    Maximal covering location problem solved with IBM CP Optimizer (requires docplex and a CPLEX install).
+
+    Variables and constraints are added once; solving another objective removes the previous
+    objective expression and adds the new one. A warm start is set as the solver's starting point.
+    """
+
+    def __init__(self, neighbours, num_locations, num_sites=None, time_limit=None):
+        try:
+            from docplex.cp.model import CpoModel
+        except ImportError as e:
+            raise ImportError("The 'cpo' backend requires docplex with CP Optimizer installed") from e
+
+        self.neighbours = neighbours
+        self.num_zones = len(neighbours)
+        self.num_sites = self.num_zones if num_sites is None else num_sites
+        self.time_limit = time_limit
+        self.J = list(range(self.num_sites))
+        self.I = list(range(self.num_zones))
+
+        self.mdl = CpoModel(name="E-Scooter Optimization")
+        self.xj = self.mdl.binary_var_dict(self.J, name="location_selection")
+        self.yi = self.mdl.binary_var_dict(self.I, name="zone_coverage")
+        for i in self.I:
+            self.mdl.add(self.yi[i] <= self.mdl.sum(self.xj[int(j)] for j in neighbours[i]))
+        self.mdl.add(self.mdl.sum(self.xj[j] for j in self.J) == num_locations)
+        self.objective = None
+
+    def solve(self, weights, start=None, lower_bound=None):
+        if self.objective is not None:
+            self.mdl.remove(self.objective)
+        self.objective = self.mdl.maximize(self.mdl.sum(float(weights[i]) * self.yi[i] for i in self.I))
+        self.mdl.add(self.objective)
+
+        if start is not None:
+            from docplex.cp.solution import CpoModelSolution
+
+            selected = set(int(j) for j in start)
+            starting_point = CpoModelSolution()
+            for j in self.J:
+                starting_point.add_integer_var_solution(self.xj[j], 1 if j in selected else 0)
+            self.mdl.set_starting_point(starting_point)
+
+        solution = self.mdl.solve(TimeLimit=self.time_limit) if self.time_limit is not None else self.mdl.solve()
+        if not solution:
+            return _empty_result(str(solution.get_solve_status()))
+
+        selected_locations = [j for j in self.J if solution[self.xj[j]] == 1]
+        covered_zones = covered_zones_of(self.neighbours, selected_locations)
+        return {
+            'status': 'optimal' if solution.is_solution_optimal() else 'feasible',
+            'objective_value': float(sum(weights[i] for i in covered_zones)),
+            'selected_locations': selected_locations,
+            'covered_zones': covered_zones
+        }
+
+
+def evaluate_sites(weights, neighbours, selected_locations):
+    """
+    Objective value and covered zones of a given site set.
+    """
+    covered_zones = covered_zones_of(neighbours, selected_locations)
+    return float(sum(weights[i] for i in covered_zones)), covered_zones
+
+
+def extend_sites(weights, neighbours, selected_locations, num_locations, num_sites=None):
+    """
+    Turn a site set into a feasible start of a different size: keep the first sites if it is too large,
+    otherwise add the sites with the largest marginal coverage gain one at a time.
+    """
+    return lazy_greedy(weights, site_coverage(neighbours, num_sites), num_locations, initial=list(selected_locations))
+
+
+def solve_warm(model, weights, start=None, upper_bound=None):
+    """
+    Solve with a warm start from a neighbouring sweep point.
+
+    Coverage is monotone in the number of locations and the distance threshold, so the start's value
+    is a lower bound on the optimum. When it already reaches the given upper bound the start is optimal
+    and the solve is skipped; otherwise it is passed to the backend as starting point and bound.
+
+    Args:
+        model (HighsCoveringModel or CpoCoveringModel): Model of the current sweep point.
+        weights (list): Objective weight of every zone.
+        start (list): Feasible site set of the current sweep point, e.g. from extend_sites.
+        upper_bound (float): Upper bound of the objective, e.g. from CoverageSweep.upper_bound.
+
+    Returns:
+        dict: status, objective_value, selected_locations and covered_zones.
+    """
+    if start is None:
+        return model.solve(weights)
+
+    value, covered_zones = evaluate_sites(weights, model.neighbours, start)
+    if upper_bound is not None and value >= upper_bound - 1e-9 * max(1.0, abs(upper_bound)):
+        return {
+            'status': 'optimal',
+            'objective_value': value,
+            'selected_locations': sorted(int(j) for j in start),
+            'covered_zones': covered_zones
+        }
+    return model.solve(weights, start=start, lower_bound=value)
+
+
+BACKENDS = {
+    'highs': HighsCoveringModel,
+    'cpo': CpoCoveringModel,
+    'greedy': GreedyCoveringModel,
+    'interchange': partial(GreedyCoveringModel, local_search=True),
+}
+
+
+def covering_model(neighbours, num_locations, backend='highs', num_sites=None, time_limit=None):
+    """
+    Build a reusable maximal covering model: the coverage and cardinality constraints are
+    created once and every solve(weights) call only swaps the objective.
+
+    Args:
+        neighbours (list): For every zone, the indices of the sites covering it.
+        num_locations (int): Number of sites to select.
+        backend (str): 'highs' (scipy, no CPLEX needed), 'cpo' (CP Optimizer), 'greedy' (lazy greedy heuristic)
+            or 'interchange' (lazy greedy improved by interchange local search).
+        num_sites (int): Number of candidate sites, defaults to the number of zones.
+        time_limit (float): Optional solver time limit in seconds.
+
+    Returns:
+        HighsCoveringModel, CpoCoveringModel or GreedyCoveringModel
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown MCLP backend '{backend}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[backend](neighbours, num_locations, num_sites=num_sites, time_limit=time_limit)
+
+
+def solve_mclp(weights, neighbours, num_locations, backend='highs', num_sites=None, time_limit=None):
+    """
+    Solve a single maximal covering location problem with the chosen backend.
+
+    Args:
+        weights (list): Objective weight of every zone (population, POI count, accessibility, ...).
+        neighbours (list): For every zone, the indices of the sites covering it.
+        num_locations (int): Number of sites to select.
+        backend (str): 'highs' (scipy, no CPLEX needed), 'cpo' (CP Optimizer), 'greedy' (lazy greedy heuristic)
+            or 'interchange' (lazy greedy improved by interchange local search).
+        num_sites (int): Number of candidate sites, defaults to the number of zones.
+        time_limit (float): Optional solver time limit in seconds.
+
+    Returns:
+        dict: status, objective_value, selected_locations and covered_zones.
+    """
+    model = covering_model(neighbours, num_locations, backend=backend, num_sites=num_sites, time_limit=time_limit)
+    return model.solve(weights)
+
+
+def solve_objectives(objectives, neighbours, num_locations, backend='highs', num_sites=None, time_limit=None):
+    """
+    Solve several objectives over the same coverage with one model.
+
+    Args:
+        objectives (dict): Objective name -> per-zone weights.
+
+    Returns:
+        dict: Objective name -> solve_mclp style result, in the order of objectives.
+    """
+    model = covering_model(neighbours, num_locations, backend=backend, num_sites=num_sites, time_limit=time_limit)
+    return {name: model.solve(weights) for name, weights in objectives.items()}
@@ -0,0 +1,112 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class ReverseGeocodeCache:
+    """
+    On-disk SQLite cache for reverse-geocoded addresses.
+
+    Coordinates are rounded to a configurable number of decimals before being used as a key,
+    so stops that are re-fetched with slightly different coordinates share one entry.
+    """
+
+    def __init__(self, path="cache/reverse_geocode.sqlite", precision=5, ttl_seconds=30 * 24 * 3600, offline=False):
+        """
+        Open (or create) the cache database.
+
+        Parameters:
+            path (str): Path to the SQLite file.
+            precision (int): Number of decimals the coordinates are rounded to.
+            ttl_seconds (float): Age after which an entry is considered expired (None disables expiry).
+            offline (bool): Cache-only mode, misses are never resolved through the network.
+        """
+        self.path = path
+        self.precision = precision
+        self.ttl_seconds = ttl_seconds
+        self.offline = offline
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS reverse_geocode (
+                latitude REAL NOT NULL,
+                longitude REAL NOT NULL,
+                address TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (latitude, longitude)
+            )
+            """
+        )
+        self._connection.commit()
+
+    def key(self, latitude, longitude):
+        """
+        Rounded (latitude, longitude) pair used as the cache key.
+        """
+        return round(float(latitude), self.precision), round(float(longitude), self.precision)
+
+    def _is_expired(self, created_at):
+        return self.ttl_seconds is not None and time.time() - created_at > self.ttl_seconds
+
+    def get(self, latitude, longitude):
+        """
+        Return the cached address for the coordinates, or None on a miss or an expired entry.
+        """
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT address, created_at FROM reverse_geocode WHERE latitude = ? AND longitude = ?",
+                self.key(latitude, longitude)
+            ).fetchone()
+            if row is None or self._is_expired(row[1]):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return row[0]
+
+    def put(self, latitude, longitude, address):
+        """
+        Store the address for the coordinates, replacing any previous entry.
+        """
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO reverse_geocode (latitude, longitude, address, created_at) VALUES (?, ?, ?, ?)",
+                (*self.key(latitude, longitude), address, time.time())
+            )
+            self._connection.commit()
+
+    def purge_expired(self):
+        """
+        Delete expired entries and return how many were removed.
+        """
+        if self.ttl_seconds is None:
+            return 0
+        with self._lock:
+            cursor = self._connection.execute(
+                "DELETE FROM reverse_geocode WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+            self._connection.commit()
+            return cursor.rowcount
+
+    def stats(self):
+        """
+        Return the hit/miss counters of this cache instance.
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
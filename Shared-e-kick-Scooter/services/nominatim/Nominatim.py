@@ -1,34 +1,190 @@
-import json
 from geopy.distance import geodesic
 from geopy.geocoders import Nominatim
 
+from services.json_api.DatabaseSession import as_session
+from services.nominatim.GeocodeCache import ReverseGeocodeCache
+from services.spatial_index.NeighbourhoodIndex import normalize_neighbourhood_name
+
+NOMINATIM_REVERSE_URL = "https://nominatim.openstreetmap.org/reverse"
+
+_geolocators = {}
+_geocode_cache = None
+
+
+def configure_geocode_cache(path="cache/reverse_geocode.sqlite", precision=5, ttl_seconds=30 * 24 * 3600, offline=False):
+    """
+    Configure the persistent cache used by get_address_from_lat_lon.
+
+    Parameters:
+        path (str): Path to the SQLite cache file.
+        precision (int): Number of decimals the coordinates are rounded to when used as a key.
+        ttl_seconds (float): Age after which cached addresses are fetched again (None disables expiry).
+        offline (bool): Cache-only mode, misses are reported instead of querying Nominatim.
+
+    Returns:
+        ReverseGeocodeCache: The configured cache.
+    """
+    global _geocode_cache
+    if _geocode_cache is not None:
+        _geocode_cache.close()
+    _geocode_cache = ReverseGeocodeCache(path, precision=precision, ttl_seconds=ttl_seconds, offline=offline)
+    return _geocode_cache
+
+
+def get_geocode_cache():
+    """
+    Return the reverse-geocoding cache, creating it with the default settings on first use.
+    """
+    if _geocode_cache is None:
+        configure_geocode_cache()
+    return _geocode_cache
+
+
+def _get_geolocator(timeout):
+    if timeout not in _geolocators:
+        _geolocators[timeout] = Nominatim(user_agent="geoapi", timeout=timeout)  # Set a longer timeout
+    return _geolocators[timeout]
+
+
 def get_address_from_lat_lon(latitude, longitude, timeout=10):
     """
     Get the address from latitude and longitude using reverse geocoding,
     with a configurable timeout to avoid ReadTimeoutError.
+    Answers are served from the persistent cache when available.
     """
+    cache = get_geocode_cache()
+    address = cache.get(latitude, longitude)
+    if address is not None:
+        return address
+    if cache.offline:
+        print(f"Address not cached for ({latitude}, {longitude}) in offline mode")
+        return "Error: address not cached in offline mode"
     try:
-        geolocator = Nominatim(user_agent="geoapi", timeout=timeout)  # Set a longer timeout
+        geolocator = _get_geolocator(timeout)
         location = geolocator.reverse((latitude, longitude))
-        return location.address if location else "Address not found"
+        address = location.address if location else "Address not found"
+        cache.put(latitude, longitude, address)
+        return address
+    except Exception as e:
+        print(f"Error fetching address: {e}")
+        return f"Error: {e}"
+
+
+async def get_address_from_lat_lon_async(fetcher, latitude, longitude):
+    """
+    Asynchronous variant of get_address_from_lat_lon going through an AsyncFetcher.
+    Answers are served from and stored in the same persistent cache.
+    """
+    cache = get_geocode_cache()
+    address = cache.get(latitude, longitude)
+    if address is not None:
+        return address
+    if cache.offline:
+        print(f"Address not cached for ({latitude}, {longitude}) in offline mode")
+        return "Error: address not cached in offline mode"
+    try:
+        data = await fetcher.get_json(
+            NOMINATIM_REVERSE_URL,
+            params={"lat": latitude, "lon": longitude, "format": "json", "addressdetails": 1}
+        )
+        address = data.get("display_name") or "Address not found"
+        cache.put(latitude, longitude, address)
+        return address
     except Exception as e:
         print(f"Error fetching address: {e}")
         return f"Error: {e}"
 
 
-def calculate_distances(database_path):
+def prefetch_addresses(points, fetcher):
+    """
+    Reverse-geocode many points concurrently, filling the persistent cache.
+
+    Parameters:
+        points (list): (latitude, longitude) pairs; points sharing a cache key are fetched once.
+        fetcher (AsyncFetcher): Fetch layer applying the concurrency and rate limits.
+
+    Returns:
+        dict: Cache key -> address for every distinct point.
+    """
+    cache = get_geocode_cache()
+    unique_points = {}
+    for latitude, longitude in points:
+        unique_points.setdefault(cache.key(latitude, longitude), (latitude, longitude))
+
+    async def fetch_all():
+        return await fetcher.gather(
+            get_address_from_lat_lon_async(fetcher, latitude, longitude)
+            for latitude, longitude in unique_points.values()
+        )
+
+    addresses = fetcher.run(fetch_all())
+    return dict(zip(unique_points.keys(), addresses))
+
+
+def _stop_key(item):
+    """
+    Identity of a stop across neighbourhoods: its OpenStreetMap id, or its coordinates when it has none.
+    """
+    if item.get("osm_id") is not None:
+        return item["osm_id"]
+    return item["latitude"], item["longitude"]
+
+
+def _reassign_to_containing_neighbourhood(data, neighbourhood_index):
+    """
+    Move every POI, bus station and metro station into the neighbourhood whose boundary contains it.
+    A geocoded address can match several neighbourhoods, so every copy of an item is removed first and
+    the item is added back once; like assign_stops_to_neighbourhoods, it goes to every entry sharing
+    the polygon's normalized name.
+    Items outside all known boundaries, or whose target entries have no list of that kind, stay where they are.
+    """
+    positions_by_name = {}
+    for position, neighborhood in enumerate(data):
+        positions_by_name.setdefault(normalize_neighbourhood_name(neighborhood.get("neighbourhood")), []).append(position)
+    for key, counter in [("pois", "poi_number"), ("bus_stations", "bus_station_number"), ("metro_stations", "metro_station_number")]:
+        # Stop key -> (first copy of the item, positions of the neighbourhoods holding a copy)
+        placements = {}
+        for position, neighborhood in enumerate(data):
+            for item in neighborhood.get(key, []):
+                _, positions = placements.setdefault(_stop_key(item), (item, []))
+                if position not in positions:
+                    positions.append(position)
+
+        buckets = [[] for _ in data]
+        for item, positions in placements.values():
+            polygon_name = neighbourhood_index.assign(item["latitude"], item["longitude"])
+            targets = []
+            if polygon_name is not None:
+                targets = [
+                    target for target in positions_by_name.get(normalize_neighbourhood_name(polygon_name), [])
+                    if key in data[target]
+                ]
+            for target in targets or positions:
+                buckets[target].append(item)
+        for neighborhood, items in zip(data, buckets):
+            if key in neighborhood:
+                neighborhood[key] = items
+                neighborhood[counter] = len(items)
+
+
+def calculate_distances(database_path, neighbourhood_index=None):
     """
     Calculates the distance of each POI, bus station, and metro station to the center of its neighborhood.
 
     Parameters:
-        database_path (str): Path to the input JSON file.
+        database_path (str | DatabaseSession): Path to the input JSON file or an open database session.
+        neighbourhood_index (NeighbourhoodIndex): Optional offline polygon index; when given, items are first
+            moved into the neighbourhood whose boundary contains them.
 
     Returns:
         None
     """
     # Load the JSON data
-    with open(database_path, "r", encoding="utf-8") as file:
-        data = json.load(file)
+    session = as_session(database_path)
+    data = session.data
+
+    if neighbourhood_index is not None:
+        _reassign_to_containing_neighbourhood(data, neighbourhood_index)
 
     # Calculate distance_to_center for each neighborhood
     for neighborhood in data:
@@ -45,5 +201,5 @@ def calculate_distances(database_path):
                             item["distance_to_center"] = geodesic(item_coords, center_coords).kilometers
 
     # Save the updated JSON
-    with open(database_path, "w", encoding="utf-8") as file:
-        json.dump(data, file, ensure_ascii=False, indent=4)
+    session.mark_dirty()
+    session.checkpoint()
@@ -0,0 +1,129 @@
+import numpy as np
+
+
+def dominance_matrix(fitness):
+    """
+    Boolean matrix whose entry (i, j) is True when individual i dominates j (all objectives maximized).
+    """
+    fitness = np.asarray(fitness, dtype=np.float64)
+    at_least = np.ones((len(fitness), len(fitness)), dtype=bool)
+    better = np.zeros((len(fitness), len(fitness)), dtype=bool)
+    for values in fitness.T:
+        at_least &= values[:, None] >= values[None, :]
+        better |= values[:, None] > values[None, :]
+    return at_least & better
+
+
+def fast_non_dominated_sort(fitness):
+    """
+    NSGA-II fast non-dominated sorting.
+
+    Returns:
+        list: Index arrays of the successive fronts, the first one being the non-dominated individuals.
+    """
+    dominates = dominance_matrix(fitness)
+    domination_count = dominates.sum(axis=0)  # number of individuals dominating each one
+    fronts = []
+    current = np.flatnonzero(domination_count == 0)
+    while len(current):
+        fronts.append(current)
+        # Removing a front releases the individuals it dominated
+        domination_count = domination_count - dominates[current].sum(axis=0)
+        domination_count[current] = -1
+        current = np.flatnonzero(domination_count == 0)
+    return fronts
+
+
+def crowding_distance(fitness):
+    """
+    Crowding distance of the individuals of one front, normalized by every objective's range.
+    Boundary individuals get an infinite distance, so the extremes of the front are always kept.
+    """
+    fitness = np.asarray(fitness, dtype=np.float64)
+    size, num_objectives = fitness.shape
+    distance = np.zeros(size)
+    if size <= 2:
+        distance[:] = np.inf
+        return distance
+    for m in range(num_objectives):
+        order = np.argsort(fitness[:, m], kind='stable')
+        values = fitness[order, m]
+        distance[order[0]] = distance[order[-1]] = np.inf
+        span = values[-1] - values[0]
+        if span > 0:
+            distance[order[1:-1]] += (values[2:] - values[:-2]) / span
+    return distance
+
+
+def rank_and_crowding(fitness):
+    """
+    Front rank and crowding distance of every individual.
+    """
+    rank = np.zeros(len(fitness), dtype=np.int64)
+    crowding = np.zeros(len(fitness))
+    for level, front in enumerate(fast_non_dominated_sort(fitness)):
+        rank[front] = level
+        crowding[front] = crowding_distance(np.asarray(fitness)[front])
+    return rank, crowding
+
+
+def survivor_selection(fitness, size):
+    """
+    NSGA-II environmental selection: fill with whole fronts, then the least crowded members of the last one.
+
+    Returns:
+        numpy.ndarray: Indices of the size selected individuals.
+    """
+    fitness = np.asarray(fitness)
+    selected = []
+    for front in fast_non_dominated_sort(fitness):
+        if len(selected) + len(front) <= size:
+            selected.extend(front.tolist())
+            continue
+        crowding = crowding_distance(fitness[front])
+        selected.extend(front[np.argsort(-crowding, kind='stable')[:size - len(selected)]].tolist())
+        break
+    return np.array(selected, dtype=np.int64)
+
+
+class ParetoArchive:
+    """
+    Bounded archive of non-dominated solutions.
+
+    Dominated and duplicate points are dropped on every update; when the front grows beyond
+    the capacity, the most crowded points are removed, so memory is bounded by the capacity.
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.fitness = None
+        self.solutions = None
+
+    def update(self, fitness, solutions):
+        """
+        Merge new (fitness, solution) rows into the archive.
+        """
+        fitness = np.asarray(fitness, dtype=np.float64)
+        solutions = np.asarray(solutions)
+        if self.fitness is not None:
+            fitness = np.concatenate([self.fitness, fitness])
+            solutions = np.concatenate([self.solutions, solutions])
+
+        _, unique = np.unique(fitness, axis=0, return_index=True)
+        fitness, solutions = fitness[np.sort(unique)], solutions[np.sort(unique)]
+        front = np.flatnonzero(~dominance_matrix(fitness).any(axis=0))
+        fitness, solutions = fitness[front], solutions[front]
+
+        # Drop the most crowded point one at a time, recomputing the crowding distances after each removal
+        while len(fitness) > self.capacity:
+            worst = int(np.argmin(crowding_distance(fitness)))
+            fitness = np.delete(fitness, worst, axis=0)
+            solutions = np.delete(solutions, worst, axis=0)
+
+        self.fitness, self.solutions = fitness, solutions
+
+    def front(self):
+        """
+        Archived fitness values as a list of tuples.
+        """
+        return [] if self.fitness is None else [tuple(row) for row in self.fitness.tolist()]
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+import time
+
+
+class OverpassReplayMiss(LookupError):
+    """
+    Raised in replay mode when no recorded response exists for a query.
+    """
+
+
+class OverpassCache:
+    """
+    Content-addressed disk cache for Overpass API responses.
+
+    Responses are stored next to the OSMPythonTools cache files as cache/overpass-<sha1>,
+    where the hash covers the whitespace-normalized query and the bounding box.
+    """
+
+    def __init__(self, directory="cache", ttl_seconds=7 * 24 * 3600, replay=False):
+        """
+        Parameters:
+            directory (str): Directory holding the cached responses.
+            ttl_seconds (float): Age after which a response is fetched again (None disables expiry).
+            replay (bool): Strict replay mode, recorded responses are returned regardless of their age
+                and a missing response raises OverpassReplayMiss instead of touching the network.
+        """
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.replay = replay
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(query, bounding_box=None):
+        """
+        Hash of the normalized query and the bounding box.
+        """
+        normalized_query = " ".join(query.split())
+        normalized_box = ",".join(f"{value:.7f}" for value in bounding_box) if bounding_box else ""
+        return hashlib.sha1(f"{normalized_query}|{normalized_box}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"overpass-{key}")
+
+    def get(self, query, bounding_box=None):
+        """
+        Return the recorded response for the query, or None when it is missing or expired.
+        """
+        path = self._path(self.key(query, bounding_box))
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            expired = self.ttl_seconds is not None and time.time() - entry["timestamp"] > self.ttl_seconds
+            if self.replay or not expired:
+                self.hits += 1
+                return entry["response"]
+        self.misses += 1
+        if self.replay:
+            raise OverpassReplayMiss(f"No recorded Overpass response at {path} in replay mode")
+        return None
+
+    def put(self, query, bounding_box, response):
+        """
+        Record the response for the query.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(self.key(query, bounding_box))
+        entry = {
+            "version": "1.0",
+            "timestamp": time.time(),
+            "query": " ".join(query.split()),
+            "response": response
+        }
+        # Write to a temporary file first so an interrupted run never leaves a truncated entry
+        temp_path = f"{path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(temp_path, path)
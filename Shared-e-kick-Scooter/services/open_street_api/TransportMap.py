@@ -2,20 +2,33 @@ from OSMPythonTools.nominatim import Nominatim
 import folium
 import requests
 
+from services.open_street_api.OverpassCache import OverpassCache
+
 
 class TransportMap:
-    def __init__(self, location_name, overpass_url="https://overpass-api.de/api/interpreter", radius_km=5):
+    BUS_FILTERS = [("highway", "bus_stop"), ("amenity", "bus_station")]
+    METRO_FILTERS = [
+        ("railway", "station"),
+        ("railway", "stop"),
+        ("railway", "subway_entrance"),
+        ("railway", "halt"),
+        ("public_transport", "station"),
+    ]
+
+    def __init__(self, location_name, overpass_url="https://overpass-api.de/api/interpreter", radius_km=5, overpass_cache=None):
         self.nominatim = Nominatim()
         self.overpass_url = overpass_url
+        self.overpass_cache = overpass_cache if overpass_cache is not None else OverpassCache()
         self.location_name = location_name
         self.radius_km = radius_km
         self.location = self._get_location()
         self.map = self._initialize_map()
+        self.areas = [(location_name, self.location, radius_km)]  # (name, center, radius_km) of every search area
         self.bounding_box = self._define_bounding_box()
         self.all_markers = []  # Track all markers added to this map
 
-    def _get_location(self):
-        location = self.nominatim.query(self.location_name)
+    def _get_location(self, location_name=None):
+        location = self.nominatim.query(location_name or self.location_name)
         lat, lon = location.toJSON()[0]['lat'], location.toJSON()[0]['lon']
         return float(lat), float(lon)
 
@@ -23,28 +36,59 @@ class TransportMap:
         lat, lon = self.location
         return folium.Map(location=[lat, lon], zoom_start=13)
 
-    def _define_bounding_box(self):
-        lat, lon = self.location
-        delta = self.radius_km * 0.009  # approximate degrees for 1km
+    @staticmethod
+    def _area_bounding_box(location, radius_km):
+        lat, lon = location
+        delta = radius_km * 0.009  # approximate degrees for 1km
         south = lat - delta
         north = lat + delta
         west = lon - delta
         east = lon + delta
         return south, west, north, east
 
+    def _define_bounding_box(self):
+        """
+        Bounding box covering the union of all search areas.
+        """
+        boxes = [self._area_bounding_box(location, radius_km) for _, location, radius_km in self.areas]
+        south = min(box[0] for box in boxes)
+        west = min(box[1] for box in boxes)
+        north = max(box[2] for box in boxes)
+        east = max(box[3] for box in boxes)
+        return south, west, north, east
+
+    def add_area(self, location_name, radius_km=5):
+        """
+        Add another search area to this map. Queries then cover all areas at once,
+        so stops in overlapping areas are fetched and stored only once.
+        """
+        self.areas.append((location_name, self._get_location(location_name), radius_km))
+        self.bounding_box = self._define_bounding_box()
+
+    def _in_search_areas(self, element):
+        """
+        Check whether an element lies in the bounding box of at least one search area.
+        """
+        for _, location, radius_km in self.areas:
+            south, west, north, east = self._area_bounding_box(location, radius_km)
+            if south <= element['lat'] <= north and west <= element['lon'] <= east:
+                return True
+        return False
+
     def add_search_area_circle(self):
         """
-        Add a search area circle around the center location of this map.
+        Add a search area circle around the center location of every search area of this map.
         """
-        circle = folium.Circle(
-            location=self.location,
-            radius=self.radius_km * 1000,  # Convert km to meters
-            color="red",
-            fill=True,
-            opacity=0.1,
-            popup=f"Search Area ({self.location_name}, {self.radius_km}km radius)"
-        )
-        circle.add_to(self.map)
+        for location_name, location, radius_km in self.areas:
+            circle = folium.Circle(
+                location=location,
+                radius=radius_km * 1000,  # Convert km to meters
+                color="red",
+                fill=True,
+                opacity=0.1,
+                popup=f"Search Area ({location_name}, {radius_km}km radius)"
+            )
+            circle.add_to(self.map)
 
     def add_transport_stops(self, stop_type, color, icon, poi_type=None):
         """
@@ -56,6 +100,82 @@ class TransportMap:
         self.all_markers.extend(stops)  # Store all added stops
         return stops
 
+    def add_transport_stops_batch(self, stop_types, styles, poi_types=None, fetcher=None):
+        """
+        Fetch several stop types with a single Overpass request and add them to the map.
+
+        Parameters:
+            stop_types (list): Any of "bus", "metro" and "poi".
+            styles (dict): Stop type -> (color, icon) used for the markers.
+            poi_types (list): Amenity values fetched when "poi" is requested.
+            fetcher (AsyncFetcher): Optional fetch layer used instead of a direct request.
+
+        Returns:
+            dict: {"bus": [...], "metro": [...], "poi": {poi_type: [...]}} for the requested stop types.
+        """
+        query = self._create_combined_overpass_query(stop_types, poi_types)
+        if fetcher is not None:
+            data = fetcher.run(self._query_overpass_async(query, fetcher))
+        else:
+            data = self._query_overpass(query)
+        elements_by_type = self._split_elements_by_stop_type(data, stop_types, poi_types)
+
+        stops_by_type = {}
+        for stop_type in stop_types:
+            color, icon = styles[stop_type]
+            if stop_type == "poi":
+                stops_by_type["poi"] = {}
+                for poi_type in poi_types or []:
+                    stops = self._add_markers({"elements": elements_by_type["poi"][poi_type]}, color, icon, "Poi")
+                    self.all_markers.extend(stops)
+                    stops_by_type["poi"][poi_type] = stops
+            else:
+                stops = self._add_markers({"elements": elements_by_type[stop_type]}, color, icon, stop_type.capitalize())
+                self.all_markers.extend(stops)
+                stops_by_type[stop_type] = stops
+        return stops_by_type
+
+    def _create_combined_overpass_query(self, stop_types, poi_types=None):
+        """
+        Create one Overpass union query covering all requested stop types.
+        """
+        south, west, north, east = self.bounding_box
+        bbox = f"({south},{west},{north},{east})"
+        statements = []
+        if "bus" in stop_types:
+            statements.extend(f'node["{key}"="{value}"]{bbox};' for key, value in self.BUS_FILTERS)
+        if "metro" in stop_types:
+            statements.extend(f'node["{key}"="{value}"]{bbox};' for key, value in self.METRO_FILTERS)
+        if "poi" in stop_types:
+            if not poi_types:
+                raise ValueError("Unsupported stop type or POI type missing")
+            statements.append(f'node["amenity"~"^({"|".join(poi_types)})$"]{bbox};')
+        if not statements:
+            raise ValueError("Unsupported stop type or POI type missing")
+        body = "\n                    ".join(statements)
+        return f"""
+                [out:json];
+                (
+                    {body}
+                );
+                out body;
+            """
+
+    def _split_elements_by_stop_type(self, data, stop_types, poi_types=None):
+        """
+        Split the elements of a combined query by tag, the same way the single-type queries select them.
+        """
+        elements_by_type = {"bus": [], "metro": [], "poi": {poi_type: [] for poi_type in poi_types or []}}
+        for element in data.get('elements', []):
+            tags = element.get('tags', {})
+            if "bus" in stop_types and any(tags.get(key) == value for key, value in self.BUS_FILTERS):
+                elements_by_type["bus"].append(element)
+            if "metro" in stop_types and any(tags.get(key) == value for key, value in self.METRO_FILTERS):
+                elements_by_type["metro"].append(element)
+            if "poi" in stop_types and tags.get('amenity') in elements_by_type["poi"]:
+                elements_by_type["poi"][tags['amenity']].append(element)
+        return elements_by_type
+
     def _create_overpass_query(self, stop_type, poi_type=None):
         """
         Create an Overpass API query based on the stop type.
@@ -95,19 +215,45 @@ class TransportMap:
 
     def _query_overpass(self, query):
         """
-        Perform a query to the Overpass API.
+        Perform a query to the Overpass API, served from the response cache when recorded.
+        """
+        data = self.overpass_cache.get(query, self.bounding_box)
+        if data is None:
+            response = requests.get(self.overpass_url, params={'data': query})
+            response.raise_for_status()
+            data = response.json()
+            self.overpass_cache.put(query, self.bounding_box, data)
+        return self._filter_to_search_areas(data)
+
+    async def _query_overpass_async(self, query, fetcher):
         """
-        response = requests.get(self.overpass_url, params={'data': query})
-        response.raise_for_status()
-        return response.json()
+        Perform a query to the Overpass API through an AsyncFetcher, served from the response cache when recorded.
+        """
+        data = self.overpass_cache.get(query, self.bounding_box)
+        if data is None:
+            data = await fetcher.get_json(self.overpass_url, params={'data': query})
+            self.overpass_cache.put(query, self.bounding_box, data)
+        return self._filter_to_search_areas(data)
+
+    def _filter_to_search_areas(self, data):
+        if len(self.areas) > 1 and 'elements' in data:
+            # The union bounding box is larger than the areas themselves, drop what lies outside all of them
+            data['elements'] = [element for element in data['elements'] if self._in_search_areas(element)]
+        return data
 
     def _add_markers(self, data, color, icon, location_type):
         """
         Add markers to the map and return a list of stops.
         """
         stops = []
+        seen_ids = set()
         if 'elements' in data:
             for element in data['elements']:
+                # Skip elements returned more than once (e.g. by overlapping union members)
+                if element.get('id') is not None:
+                    if element['id'] in seen_ids:
+                        continue
+                    seen_ids.add(element['id'])
                 popup_info = (
                     f"<b>{location_type}</b><br>"
                     f"Name: {element.get('tags', {}).get('name', 'N/A')}<br>"
@@ -122,6 +268,7 @@ class TransportMap:
                 )
                 marker.add_to(self.map)
                 stop_info = {
+                    "osm_id": element.get('id'),
                     "name": element.get('tags', {}).get('name', 'N/A'),
                     "latitude": element['lat'],
                     "longitude": element['lon'],
@@ -134,8 +281,11 @@ class TransportMap:
         """
         Merge markers and search areas from another TransportMap instance.
         """
-        # Add all markers from the other map
+        # Add all markers from the other map, skipping stops already on this map
+        known_ids = {stop.get('osm_id') for stop in self.all_markers if stop.get('osm_id') is not None}
         for stop in other_map.all_markers:
+            if stop.get('osm_id') is not None and stop['osm_id'] in known_ids:
+                continue
             popup_info = (
                 f"<b>Stop</b><br>"
                 f"Name: {stop['name']}<br>"
@@ -149,15 +299,16 @@ class TransportMap:
             marker.add_to(self.map)
             self.all_markers.append(stop)  # Keep track of merged markers
 
-        # Add the search area circle from the other map
-        folium.Circle(
-            location=other_map.location,
-            radius=other_map.radius_km * 1000,
-            color="blue",  # Distinguish with another color
-            fill=True,
-            opacity=0.2,
-            popup=f"Search Area ({other_map.location_name}, {other_map.radius_km}km radius)"
-        ).add_to(self.map)
+        # Add the search area circles from the other map
+        for location_name, location, radius_km in other_map.areas:
+            folium.Circle(
+                location=location,
+                radius=radius_km * 1000,
+                color="blue",  # Distinguish with another color
+                fill=True,
+                opacity=0.2,
+                popup=f"Search Area ({location_name}, {radius_km}km radius)"
+            ).add_to(self.map)
 
     def save_map(self, filename="transport_map.html"):
         """
@@ -0,0 +1,150 @@
+import json
+import math
+import os
+
+from services.localize_char.LocalizeChar import tr_upper
+
+
+def normalize_neighbourhood_name(name):
+    """
+    Normalize a neighbourhood name so boundary files and the database use the same spelling.
+
+    Parameters:
+        name (str): Neighbourhood name, e.g. "19 Mayıs Mahallesi" or "19 MAYIS MAH.".
+
+    Returns:
+        str: Upper-cased name with the "MAHALLESİ" suffix abbreviated to "MAH.".
+    """
+    name = " ".join(tr_upper(name or "").split())
+    for suffix in (" MAHALLESİ", " MAHALLESI", " MAH"):
+        if name.endswith(suffix):
+            return name[:-len(suffix)] + " MAH."
+    return name
+
+
+def _point_in_rings(lon, lat, rings):
+    """
+    Even-odd ray casting over all rings of a polygon (outer ring and holes).
+    """
+    inside = False
+    for ring in rings:
+        count = len(ring)
+        for k in range(count):
+            x1, y1 = ring[k - 1]
+            x2, y2 = ring[k]
+            if (y1 > lat) != (y2 > lat):
+                x_cross = x1 + (lat - y1) * (x2 - x1) / (y2 - y1)
+                if lon < x_cross:
+                    inside = not inside
+    return inside
+
+
+class NeighbourhoodIndex:
+    """
+    Offline point-in-polygon assignment of coordinates to neighbourhoods.
+
+    Boundary polygons are bucketed into a uniform grid once, so each lookup only
+    tests the few polygons whose bounding box overlaps the grid cell of the point.
+    """
+
+    def __init__(self, polygons, cells_per_axis=None):
+        """
+        Build the grid index.
+
+        Parameters:
+            polygons (list): (name, rings) tuples, rings being lists of (longitude, latitude) pairs.
+            cells_per_axis (int): Grid resolution, defaults to about two cells per polygon per axis.
+        """
+        self.names = []
+        self.rings = []
+        self.boxes = []
+        for name, rings in polygons:
+            rings = [[(float(x), float(y)) for x, y in ring] for ring in rings if len(ring) >= 3]
+            if not rings:
+                continue
+            xs = [x for ring in rings for x, _ in ring]
+            ys = [y for ring in rings for _, y in ring]
+            self.names.append(name)
+            self.rings.append(rings)
+            self.boxes.append((min(xs), min(ys), max(xs), max(ys)))
+
+        if not self.boxes:
+            raise ValueError("No valid neighbourhood polygons to index")
+
+        self.min_x = min(box[0] for box in self.boxes)
+        self.min_y = min(box[1] for box in self.boxes)
+        self.max_x = max(box[2] for box in self.boxes)
+        self.max_y = max(box[3] for box in self.boxes)
+        self.cells_per_axis = cells_per_axis or max(1, 2 * math.ceil(math.sqrt(len(self.boxes))))
+        self.cell_width = (self.max_x - self.min_x) / self.cells_per_axis or 1.0
+        self.cell_height = (self.max_y - self.min_y) / self.cells_per_axis or 1.0
+
+        self.grid = {}
+        for index, (min_x, min_y, max_x, max_y) in enumerate(self.boxes):
+            first_col, first_row = self._cell(min_x, min_y)
+            last_col, last_row = self._cell(max_x, max_y)
+            for col in range(first_col, last_col + 1):
+                for row in range(first_row, last_row + 1):
+                    self.grid.setdefault((col, row), []).append(index)
+
+    @classmethod
+    def from_geojson(cls, path, name_property="name", cells_per_axis=None):
+        """
+        Load neighbourhood boundaries from a GeoJSON FeatureCollection of (Multi)Polygons.
+
+        Parameters:
+            path (str): Path to the GeoJSON file.
+            name_property (str): Feature property holding the neighbourhood name.
+            cells_per_axis (int): Grid resolution passed to the constructor.
+
+        Returns:
+            NeighbourhoodIndex: The index over all polygon features.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            collection = json.load(f)
+
+        polygons = []
+        for feature in collection.get("features", []):
+            geometry = feature.get("geometry") or {}
+            name = (feature.get("properties") or {}).get(name_property)
+            if name is None:
+                continue
+            if geometry.get("type") == "Polygon":
+                polygons.append((name, geometry["coordinates"]))
+            elif geometry.get("type") == "MultiPolygon":
+                for polygon in geometry["coordinates"]:
+                    polygons.append((name, polygon))
+        return cls(polygons, cells_per_axis=cells_per_axis)
+
+    def _cell(self, lon, lat):
+        col = min(int((lon - self.min_x) / self.cell_width), self.cells_per_axis - 1)
+        row = min(int((lat - self.min_y) / self.cell_height), self.cells_per_axis - 1)
+        return col, row
+
+    def assign(self, latitude, longitude):
+        """
+        Return the name of the neighbourhood containing the point, or None if it is outside all polygons.
+        """
+        if not (self.min_x <= longitude <= self.max_x and self.min_y <= latitude <= self.max_y):
+            return None
+        for index in self.grid.get(self._cell(longitude, latitude), ()):
+            min_x, min_y, max_x, max_y = self.boxes[index]
+            if min_x <= longitude <= max_x and min_y <= latitude <= max_y:
+                if _point_in_rings(longitude, latitude, self.rings[index]):
+                    return self.names[index]
+        return None
+
+    def assign_many(self, points):
+        """
+        Assign a list of (latitude, longitude) points, returning one name (or None) per point.
+        """
+        return [self.assign(latitude, longitude) for latitude, longitude in points]
+
+
+def load_neighbourhood_index(path, name_property="name"):
+    """
+    Load a NeighbourhoodIndex from a GeoJSON file, or return None when the file does not exist.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    return NeighbourhoodIndex.from_geojson(path, name_property=name_property)
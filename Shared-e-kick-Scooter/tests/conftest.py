@@ -0,0 +1,27 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# The services and report_scripts packages are imported from the project directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def random_instance(seed, num_zones=12, density=0.25):
+    """
+    Small random covering instance: neighbour lists (every zone covers itself) and integer weights.
+    """
+    rng = np.random.default_rng(seed)
+    neighbours = []
+    for i in range(num_zones):
+        covering = rng.random(num_zones) < density
+        covering[i] = True
+        neighbours.append(np.flatnonzero(covering))
+    weights = rng.integers(1, 100, size=num_zones).astype(np.float64)
+    return neighbours, weights
+
+
+@pytest.fixture(params=range(5))
+def instance(request):
+    return random_instance(request.param)
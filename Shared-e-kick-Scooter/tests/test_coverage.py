@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from services.coverage import BitsetCoverage
+from services.mclp import covered_zones_of
+
+
+@pytest.mark.parametrize("num_zones", [5, 8, 21])
+def test_bitsets_match_neighbour_lists(num_zones):
+    rng = np.random.default_rng(num_zones)
+    neighbours = [np.flatnonzero(rng.random(num_zones) < 0.3) for _ in range(num_zones)]
+    weights = {'population': rng.integers(0, 1000, num_zones), 'poi': rng.random(num_zones)}
+    coverage = BitsetCoverage(neighbours, weights)
+    population = np.sort(rng.choice(num_zones, size=(30, 3)), axis=1)
+
+    masks = coverage.covered(population)
+    assert masks.shape == (30, (num_zones + 7) // 8)
+    for sites, covered, count, sums in zip(population, coverage.to_bool(masks), coverage.count(masks),
+                                          coverage.weighted_sums(masks)):
+        expected = covered_zones_of(neighbours, sites)
+        assert np.flatnonzero(covered).tolist() == expected
+        assert count == len(expected)
+        assert sums == pytest.approx([weights['population'][expected].sum(), weights['poi'][expected].sum()])
+
+
+def test_bitset_layout_matches_packbits():
+    neighbours = [[0], [0, 1], [1], [0], [2], [2], [0], [1], [2]]
+    coverage = BitsetCoverage(neighbours, num_sites=3)
+    dense = np.zeros((3, 9), dtype=bool)
+    for i, sites in enumerate(neighbours):
+        dense[sites, i] = True
+
+    assert (coverage.bits == np.packbits(dense, axis=1, bitorder='little')).all()
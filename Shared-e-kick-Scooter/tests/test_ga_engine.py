@@ -0,0 +1,100 @@
+import numpy as np
+import pytest
+
+from services.ga_engine import FitnessCache, PopulationEngine
+from services.mclp import evaluate_sites
+
+
+def make_engine(instance, num_locations=3, seed=0, cache_size=0):
+    neighbours, weights = instance
+    return PopulationEngine({'weights': weights, 'ones': np.ones_like(weights)}, num_locations, neighbours,
+                            seed=seed, cache_size=cache_size)
+
+
+def test_evaluate_matches_covered_weights(instance):
+    neighbours, weights = instance
+    engine = make_engine(instance)
+    population = engine.random_population(40)
+    fitness = engine.evaluate(population)
+
+    assert fitness.shape == (40, 2)
+    for sites, (value, count) in zip(population, fitness):
+        expected_value, covered_zones = evaluate_sites(weights, neighbours, sites)
+        assert value == pytest.approx(expected_value)
+        assert count == len(covered_zones)
+
+
+def test_without_neighbours_scores_the_selected_zones(instance):
+    _, weights = instance
+    engine = PopulationEngine({'weights': weights}, 3, seed=0, cache_size=0)
+    population = engine.random_population(20)
+
+    assert engine.evaluate(population)[:, 0] == pytest.approx(weights[population].sum(axis=1))
+
+
+def test_seeded_runs_are_reproducible(instance):
+    def offspring(engine):
+        population = engine.random_population(10)
+        children = engine.uniform_crossover(population[:5], population[5:])
+        return engine.swap_mutate(np.concatenate(children))
+
+    assert (offspring(make_engine(instance, seed=42)) == offspring(make_engine(instance, seed=42))).all()
+
+
+def assert_k_site_plans(population, num_locations, num_sites):
+    population = np.asarray(population)
+    assert population.shape[1] == num_locations
+    assert ((population >= 0) & (population < num_sites)).all()
+    # Sorted strictly increasing rows have distinct sites
+    assert (np.diff(population, axis=1) > 0).all()
+
+
+def test_repair_keeps_exactly_k_distinct_sites(instance):
+    engine = make_engine(instance, num_locations=4)
+    rng = np.random.default_rng(1)
+    # Preferred sites with duplicates, fewer or more than k sites
+    for width in (0, 2, 4, 7):
+        preferred = rng.integers(0, engine.num_sites, size=(30, width))
+        repaired = engine.repair(preferred)
+        assert_k_site_plans(repaired, 4, engine.num_sites)
+        if width <= 4:
+            # Distinct preferred sites are always kept
+            for row, sites in zip(preferred, repaired):
+                assert set(row.tolist()) <= set(sites.tolist())
+
+
+def test_operators_keep_k_site_plans(instance):
+    engine = make_engine(instance, num_locations=3)
+    engine.mutation_rate = 0.5
+    population = engine.random_population(50)
+    assert_k_site_plans(population, 3, engine.num_sites)
+
+    child1, child2 = engine.uniform_crossover(population[:25], population[25:])
+    assert_k_site_plans(child1, 3, engine.num_sites)
+    assert_k_site_plans(child2, 3, engine.num_sites)
+    assert_k_site_plans(engine.swap_mutate(population), 3, engine.num_sites)
+
+
+def test_cache_evicts_the_least_recently_used_entry():
+    cache = FitnessCache(maxsize=2)
+    cache.put((0, 1), (1.0,))
+    cache.put((0, 2), (2.0,))
+    assert cache.get((0, 1)) == (1.0,)  # (0, 2) is now the least recently used
+    cache.put((0, 3), (3.0,))
+
+    assert len(cache.entries) == 2
+    assert cache.get((0, 2)) is None
+    assert cache.get((0, 1)) == (1.0,) and cache.get((0, 3)) == (3.0,)
+    assert cache.stats() == {"hits": 3, "misses": 1, "hit_rate": 0.75, "entries": 2}
+
+
+def test_cached_fitness_matches_uncached(instance):
+    cached, uncached = make_engine(instance, cache_size=5), make_engine(instance)
+    population = cached.random_population(30)
+    # Repeated individuals are answered from the cache
+    population = np.concatenate([population, population[:10]])
+
+    assert cached.evaluate(population) == pytest.approx(uncached.evaluate(population))
+    assert cached.evaluate(population) == pytest.approx(uncached.evaluate(population))
+    assert len(cached.cache.entries) <= 5
+    assert cached.cache.hits > 0
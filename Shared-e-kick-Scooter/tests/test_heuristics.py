@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+
+from services.heuristics import interchange, lazy_greedy, site_coverage
+from services.mclp import evaluate_sites, solve_mclp
+
+
+def naive_greedy(weights, neighbours, num_locations):
+    """Plain greedy: recompute every site's marginal gain at every step, lowest index wins ties."""
+    selected = []
+    for _ in range(num_locations):
+        value = evaluate_sites(weights, neighbours, selected)[0]
+        gains = [
+            -np.inf if j in selected else evaluate_sites(weights, neighbours, selected + [j])[0] - value
+            for j in range(len(neighbours))
+        ]
+        selected.append(int(np.argmax(gains)))
+    return selected
+
+
+@pytest.mark.parametrize("num_locations", [1, 3, 5])
+def test_lazy_greedy_matches_naive_greedy(instance, num_locations):
+    neighbours, weights = instance
+    lazy = lazy_greedy(weights, site_coverage(neighbours), num_locations)
+    naive = naive_greedy(weights, neighbours, num_locations)
+
+    assert len(lazy) == len(set(lazy)) == num_locations
+    assert evaluate_sites(weights, neighbours, lazy)[0] == pytest.approx(evaluate_sites(weights, neighbours, naive)[0])
+
+
+def test_lazy_greedy_keeps_initial_sites(instance):
+    neighbours, weights = instance
+    selected = lazy_greedy(weights, site_coverage(neighbours), 4, initial=[7, 3])
+
+    assert selected[:2] == [7, 3]
+    assert len(set(selected)) == 4
+
+
+def test_greedy_backend_never_beats_highs(instance):
+    neighbours, weights = instance
+    exact = solve_mclp(weights, neighbours, 3, backend='highs')
+    greedy = solve_mclp(weights, neighbours, 3, backend='greedy')
+
+    assert len(greedy['selected_locations']) == 3
+    assert greedy['objective_value'] <= exact['objective_value'] + 1e-9
+    # Lazy greedy is within (1 - 1/e) of the optimum
+    assert greedy['objective_value'] >= (1 - 1 / np.e) * exact['objective_value'] - 1e-9
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_interchange_never_lowers_coverage(instance, seed):
+    neighbours, weights = instance
+    start = sorted(np.random.default_rng(seed).choice(len(neighbours), size=3, replace=False).tolist())
+    improved = interchange(weights, site_coverage(neighbours), neighbours, start)
+
+    assert len(improved) == len(set(improved)) == 3
+    value = evaluate_sites(weights, neighbours, improved)[0]
+    assert value >= evaluate_sites(weights, neighbours, start)[0]
+    # The result is a local optimum: no single swap improves it
+    for removed in improved:
+        for added in set(range(len(neighbours))) - set(improved):
+            swapped = [j for j in improved if j != removed] + [added]
+            assert evaluate_sites(weights, neighbours, swapped)[0] <= value + 1e-9
+
+
+def test_interchange_backend_never_beats_highs(instance):
+    neighbours, weights = instance
+    exact = solve_mclp(weights, neighbours, 3, backend='highs')
+    polished = solve_mclp(weights, neighbours, 3, backend='interchange')
+    greedy = solve_mclp(weights, neighbours, 3, backend='greedy')
+
+    assert greedy['objective_value'] - 1e-9 <= polished['objective_value'] <= exact['objective_value'] + 1e-9
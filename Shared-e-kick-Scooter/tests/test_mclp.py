@@ -0,0 +1,46 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from services.mclp import covering_model, evaluate_sites, solve_mclp
+
+
+def brute_force_optimum(weights, neighbours, num_locations):
+    return max(
+        evaluate_sites(weights, neighbours, sites)[0]
+        for sites in combinations(range(len(neighbours)), num_locations)
+    )
+
+
+@pytest.mark.parametrize("num_locations", [1, 2, 3])
+def test_highs_finds_the_optimum(instance, num_locations):
+    neighbours, weights = instance
+    solution = solve_mclp(weights, neighbours, num_locations, backend='highs')
+
+    assert len(solution['selected_locations']) == num_locations
+    assert solution['objective_value'] == pytest.approx(brute_force_optimum(weights, neighbours, num_locations))
+    value, covered_zones = evaluate_sites(weights, neighbours, solution['selected_locations'])
+    assert solution['objective_value'] == pytest.approx(value)
+    assert sorted(solution['covered_zones']) == sorted(covered_zones)
+
+
+def test_highs_matches_greedy_on_disjoint_coverage():
+    # Every site only covers its own zone, so picking the heaviest zones greedily is optimal
+    neighbours = [np.array([i]) for i in range(8)]
+    weights = np.array([5.0, 1.0, 9.0, 3.0, 7.0, 2.0, 8.0, 4.0])
+
+    exact = solve_mclp(weights, neighbours, 3, backend='highs')
+    greedy = solve_mclp(weights, neighbours, 3, backend='greedy')
+
+    assert exact['objective_value'] == pytest.approx(greedy['objective_value'])
+    assert exact['selected_locations'] == greedy['selected_locations'] == [2, 4, 6]
+
+
+def test_model_is_reused_across_objectives(instance):
+    neighbours, weights = instance
+    model = covering_model(neighbours, 2, backend='highs')
+    for objective in (weights, weights[::-1].copy(), np.ones_like(weights)):
+        assert model.solve(objective)['objective_value'] == pytest.approx(
+            brute_force_optimum(objective, neighbours, 2)
+        )
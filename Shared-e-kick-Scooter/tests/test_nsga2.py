@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from services.nsga2 import ParetoArchive, crowding_distance, fast_non_dominated_sort, survivor_selection
+
+
+def dominates(a, b):
+    return all(x >= y for x, y in zip(a, b)) and any(x > y for x, y in zip(a, b))
+
+
+def brute_force_front(points):
+    return [i for i, p in enumerate(points) if not any(dominates(q, p) for q in points)]
+
+
+@pytest.fixture(params=[(0, 2), (1, 2), (2, 3)])
+def points(request):
+    seed, num_objectives = request.param
+    # Small integer values give many ties and duplicate points
+    return np.random.default_rng(seed).integers(0, 6, size=(60, num_objectives)).astype(float)
+
+
+def test_fronts_are_non_dominated_layers(points):
+    fronts = fast_non_dominated_sort(points)
+
+    assert sorted(np.concatenate(fronts).tolist()) == list(range(len(points)))
+    remaining = list(range(len(points)))
+    for front in fronts:
+        # Every front is exactly the non-dominated set of the points not yet ranked
+        expected = [remaining[i] for i in brute_force_front(points[remaining].tolist())]
+        assert sorted(front.tolist()) == expected
+        remaining = [i for i in remaining if i not in set(front.tolist())]
+
+
+def test_crowding_distance_keeps_the_extremes(points):
+    front = points[fast_non_dominated_sort(points)[0]]
+    distance = crowding_distance(front)
+
+    for m in range(points.shape[1]):
+        # One of the points holding each objective's best and worst value is always kept
+        assert np.isinf(distance[front[:, m] == front[:, m].max()]).any()
+        assert np.isinf(distance[front[:, m] == front[:, m].min()]).any()
+
+
+def test_survivor_selection_prefers_better_fronts(points):
+    selected = survivor_selection(points, 20)
+    rank = np.empty(len(points), dtype=int)
+    for level, front in enumerate(fast_non_dominated_sort(points)):
+        rank[front] = level
+
+    assert len(selected) == len(set(selected.tolist())) == 20
+    rejected = np.setdiff1d(np.arange(len(points)), selected)
+    assert rank[selected].max() <= rank[rejected].min()
+
+
+@pytest.mark.parametrize("capacity", [3, 100])
+def test_archive_holds_only_non_dominated_points(points, capacity):
+    archive = ParetoArchive(capacity)
+    solutions = np.arange(len(points))[:, None]
+    for batch in np.array_split(np.arange(len(points)), 4):
+        archive.update(points[batch], solutions[batch])
+
+    front = archive.front()
+    assert len(front) == len(set(front)) <= capacity
+    everything = points.tolist()
+    for point in front:
+        assert not any(dominates(other, point) for other in everything)
+    for row, solution in zip(archive.fitness, archive.solutions):
+        assert (points[solution[0]] == row).all()
+    if capacity >= len(points):
+        assert sorted(front) == sorted(set(tuple(everything[i]) for i in brute_force_front(everything)))